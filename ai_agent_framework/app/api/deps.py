@@ -5,10 +5,12 @@ from functools import lru_cache
 
 from app.config import get_settings, Settings
 from core.llm.factory import LLMFactory
-from core.llm.base import BaseLLM
+from core.llm.base import BaseLLM, close_http_client
 from core.vector_store.milvus_store import MilvusVectorStore
 from core.rag.embeddings import EmbeddingModel
 from core.rag.retriever import Retriever
+from core.rag.search_batcher import SearchBatcher
+from core.rag.semantic_cache import SemanticCache
 from core.rag.chain import RAGChain
 from core.prompt.manager import PromptManager
 from core.prompt.router import PromptRouter
@@ -20,6 +22,8 @@ from core.memory.manager import MemoryManager
 # Singleton instances
 _vector_store: Optional[MilvusVectorStore] = None
 _embedding_model: Optional[EmbeddingModel] = None
+_semantic_cache: Optional[SemanticCache] = None
+_search_batcher: Optional[SearchBatcher] = None
 _prompt_manager: Optional[PromptManager] = None
 _prompt_router: Optional[PromptRouter] = None
 
@@ -43,6 +47,31 @@ def get_embedding_model() -> EmbeddingModel:
     return _embedding_model
 
 
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Get singleton retrieval cache, or None when disabled."""
+    global _semantic_cache
+    settings = get_settings()
+    if _semantic_cache is None and settings.rag_semantic_cache_size > 0:
+        _semantic_cache = SemanticCache(
+            max_entries=settings.rag_semantic_cache_size,
+            threshold=settings.rag_semantic_cache_threshold,
+            ttl=settings.rag_semantic_cache_ttl
+        )
+    return _semantic_cache
+
+
+def get_search_batcher() -> Optional[SearchBatcher]:
+    """Get singleton search batcher, or None when disabled."""
+    global _search_batcher
+    settings = get_settings()
+    if _search_batcher is None and settings.rag_search_batch_size > 1:
+        _search_batcher = SearchBatcher(
+            vector_store=get_vector_store(),
+            max_batch_size=settings.rag_search_batch_size
+        )
+    return _search_batcher
+
+
 def get_prompt_manager() -> PromptManager:
     """Get singleton prompt manager instance."""
     global _prompt_manager
@@ -101,7 +130,9 @@ def get_retriever(
         vector_store=get_vector_store(),
         embedding_model=get_embedding_model(),
         collection_name=collection_name or "default_collection",
-        top_k=top_k
+        top_k=top_k,
+        semantic_cache=get_semantic_cache(),
+        search_batcher=get_search_batcher()
     )
 
 
@@ -179,3 +210,5 @@ async def cleanup():
     
     _embedding_model = None
     _memory_managers.clear()
+    
+    await close_http_client()
@@ -1,6 +1,8 @@
 """Fine-tuning routes."""
 
+import asyncio
 import os
+import threading
 import uuid
 from typing import Optional, Dict
 from pathlib import Path
@@ -11,6 +13,7 @@ from app.config import get_settings
 from core.finetune.data_processor import DataProcessor, TrainingExample
 from core.finetune.trainer import FineTuneTrainer, TrainingConfig
 from schemas.auth import UserResponse
+from utils.cache import TTLCache
 from schemas.finetune import (
     TrainingExampleInput,
     DatasetUploadRequest,
@@ -30,6 +33,12 @@ router = APIRouter(prefix="/finetune", tags=["Fine-tuning"])
 training_jobs: Dict[str, Dict] = {}
 datasets_store: Dict[str, list] = {}
 
+# Trained model listings by models directory; cleared when a training
+# job ends or a model is deleted. Locked because training jobs run on
+# threadpool threads
+_models_cache = TTLCache(max_entries=8, ttl=get_settings().finetune_models_cache_ttl)
+_models_cache_lock = threading.Lock()
+
 
 @router.post("/datasets", response_model=DatasetUploadResponse)
 async def upload_dataset(
@@ -40,9 +49,10 @@ async def upload_dataset(
     try:
         processor = DataProcessor(format=request.format)
         
-        # Convert to TrainingExample
+        # Convert to TrainingExample; fields were already validated as
+        # part of the request body
         examples = [
-            TrainingExample(
+            TrainingExample.model_construct(
                 instruction=ex.instruction,
                 input=ex.input,
                 output=ex.output
@@ -50,8 +60,8 @@ async def upload_dataset(
             for ex in request.examples
         ]
         
-        # Validate
-        validation = processor.validate_examples(examples)
+        # Validate, off the event loop since datasets can be large
+        validation = await asyncio.to_thread(processor.validate_examples, examples)
         
         if validation["invalid"] > 0:
             raise HTTPException(
@@ -70,8 +80,10 @@ async def upload_dataset(
         dataset_dir = Path(settings.finetune_output_dir) / "datasets"
         dataset_dir.mkdir(parents=True, exist_ok=True)
         
-        converted = processor.convert(examples)
-        processor.save_jsonl(converted, str(dataset_dir / f"{request.name}.jsonl"))
+        converted = await asyncio.to_thread(processor.convert, examples)
+        await asyncio.to_thread(
+            processor.save_jsonl, converted, str(dataset_dir / f"{request.name}.jsonl")
+        )
         
         return DatasetUploadResponse(
             name=request.name,
@@ -172,6 +184,9 @@ def run_training(job_id: str, dataset_name: str, config: TrainingConfigInput, ev
     except Exception as e:
         training_jobs[job_id]["status"] = "failed"
         training_jobs[job_id]["error"] = str(e)
+    finally:
+        with _models_cache_lock:
+            _models_cache.clear()
 
 
 @router.post("/train", response_model=TrainingStartResponse)
@@ -223,18 +238,8 @@ async def get_training_status(
     if job_id not in training_jobs:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = training_jobs[job_id]
-    
-    return TrainingStatusResponse(
-        job_id=job_id,
-        status=job["status"],
-        progress=job["progress"],
-        current_step=job["current_step"],
-        total_steps=job["total_steps"],
-        loss=job["loss"],
-        metrics=job["metrics"],
-        error=job["error"]
-    )
+    # Extra job keys such as "config" are ignored by the model
+    return TrainingStatusResponse(job_id=job_id, **training_jobs[job_id])
 
 
 @router.delete("/train/{job_id}")
@@ -260,6 +265,11 @@ async def list_trained_models(
     settings = get_settings()
     models_dir = Path(settings.finetune_output_dir) / "models"
     
+    with _models_cache_lock:
+        cached = _models_cache.get(str(models_dir))
+    if cached is not None:
+        return cached
+    
     models = []
     if models_dir.exists():
         for model_path in models_dir.iterdir():
@@ -283,7 +293,10 @@ async def list_trained_models(
                     config=config
                 ))
     
-    return TrainedModelsResponse(models=models)
+    response = TrainedModelsResponse(models=models)
+    with _models_cache_lock:
+        _models_cache.set(str(models_dir), response)
+    return response
 
 
 @router.delete("/models/{model_name}")
@@ -300,5 +313,7 @@ async def delete_trained_model(
     
     import shutil
     shutil.rmtree(model_path)
+    with _models_cache_lock:
+        _models_cache.clear()
     
     return {"success": True, "message": f"Model {model_name} deleted"}
@@ -45,14 +45,7 @@ async def add_memory_item(
         # Get the added item
         memory_item = await memory_manager.short_term.get(item_id)
         
-        return MemoryItemResponse(
-            id=memory_item.id,
-            content=memory_item.content,
-            role=memory_item.role,
-            importance=memory_item.importance,
-            timestamp=memory_item.timestamp,
-            metadata=memory_item.metadata
-        )
+        return MemoryItemResponse.model_validate(memory_item)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -77,19 +70,7 @@ async def search_memory(
             include_long_term=request.include_long_term
         )
         
-        items = [
-            MemoryItemResponse(
-                id=item.id,
-                content=item.content,
-                role=item.role,
-                importance=item.importance,
-                timestamp=item.timestamp,
-                metadata=item.metadata
-            )
-            for item in results
-        ]
-        
-        return MemorySearchResponse(items=items, total=len(items))
+        return MemorySearchResponse(items=results, total=len(results))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
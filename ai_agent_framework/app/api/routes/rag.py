@@ -6,7 +6,9 @@ from fastapi.responses import StreamingResponse
 import json
 
 from app.api.auth import get_current_user
-from app.api.deps import get_rag_chain, get_retriever, get_vector_store, get_embedding_model
+from app.api.deps import get_rag_chain, get_retriever, get_vector_store, get_embedding_model, get_semantic_cache
+from app.config import get_settings
+from core.rag.semantic_cache import SemanticCache
 from schemas.auth import UserResponse
 from schemas.rag import (
     DocumentInput,
@@ -14,15 +16,22 @@ from schemas.rag import (
     DocumentsUploadResponse,
     RAGQueryRequest,
     RAGQueryResponse,
-    SourceDocument,
     CollectionInfo,
     CollectionListResponse,
     CollectionCreateRequest,
 )
+from utils.cache import TTLCache
 
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
 
+# Responses to repeated identical queries; cleared whenever documents
+# or collections change
+_answer_cache = TTLCache(
+    max_entries=get_settings().rag_answer_cache_size,
+    ttl=get_settings().rag_answer_cache_ttl
+)
+
 
 @router.post("/collections", response_model=dict)
 async def create_collection(
@@ -58,6 +67,10 @@ async def delete_collection(
     try:
         vector_store = get_vector_store()
         await vector_store.drop_collection(collection_name)
+        semantic_cache = get_semantic_cache()
+        if semantic_cache is not None:
+            semantic_cache.invalidate(collection_name)
+        _answer_cache.clear()
         return {"success": True, "message": f"Collection {collection_name} deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -86,6 +99,7 @@ async def upload_documents(
         ]
         
         ids = await retriever.add_documents(documents)
+        _answer_cache.clear()
         
         return DocumentsUploadResponse(
             ids=ids,
@@ -104,6 +118,16 @@ async def query_rag(
     """Query the RAG system."""
     try:
         collection_name = request.collection_name or "default_collection"
+        cache_key = (
+            collection_name,
+            request.question,
+            SemanticCache.make_key(request.top_k, request.filters),
+            request.include_sources
+        )
+        cached = _answer_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         rag_chain = get_rag_chain(collection_name=collection_name)
         
         result = await rag_chain.query(
@@ -112,24 +136,18 @@ async def query_rag(
             filters=request.filters
         )
         
-        sources = None
-        if request.include_sources and "sources" in result:
-            sources = [
-                SourceDocument(
-                    id=s["id"],
-                    content=s["content"],
-                    score=s["score"],
-                    metadata=s.get("metadata", {})
-                )
-                for s in result["sources"]
-            ]
+        # Source dicts are validated into SourceDocument by the response
+        # model in one pass rather than constructed one by one
+        sources = result.get("sources") if request.include_sources else None
         
-        return RAGQueryResponse(
+        response = RAGQueryResponse(
             answer=result["answer"],
             sources=sources,
             model=result.get("model", ""),
             usage=result.get("usage")
         )
+        _answer_cache.set(cache_key, response)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -145,7 +163,7 @@ async def query_rag_stream(
         rag_chain = get_rag_chain(collection_name=collection_name)
         
         async def generate():
-            async for chunk in rag_chain.stream_query(
+            async for chunk in await rag_chain.stream_query(
                 question=request.question,
                 top_k=request.top_k,
                 filters=request.filters
@@ -201,6 +219,7 @@ async def delete_document(
     try:
         retriever = get_retriever(collection_name=collection_name)
         await retriever.delete_documents([document_id])
+        _answer_cache.clear()
         return {"success": True, "message": f"Document {document_id} deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -146,7 +146,7 @@ async def websocket_chat(
                 })
                 
                 full_response = ""
-                async for chunk in rag_chain.stream_query(
+                async for chunk in await rag_chain.stream_query(
                     question=question,
                     top_k=top_k
                 ):
@@ -205,7 +205,7 @@ async def websocket_rag(
             })
             
             full_response = ""
-            async for chunk in rag_chain.stream_query(
+            async for chunk in await rag_chain.stream_query(
                 question=question,
                 top_k=top_k,
                 filters=filters
@@ -52,10 +52,29 @@ class Settings(BaseSettings):
     milvus_user: str = ""
     milvus_password: str = ""
     milvus_db_name: str = "ai_agent"
+    milvus_max_workers: int = 16
+    milvus_index_type: str = "IVF_SQ8"
+    milvus_metric_type: str = "IP"
+    milvus_nlist: int = 1024
+    milvus_nprobe: int = 10
     
     # Embedding
     embedding_model: str = "BAAI/bge-base-zh-v1.5"
     embedding_device: str = "cpu"
+    embedding_cache_size: int = 4096
+    embedding_cache_ttl: Optional[float] = None
+    
+    # RAG semantic cache (size 0 disables it)
+    rag_semantic_cache_size: int = 4096
+    rag_semantic_cache_threshold: float = 0.95
+    rag_semantic_cache_ttl: float = 300.0
+    
+    # Exact-repeat RAG query responses (size 0 disables it)
+    rag_answer_cache_size: int = 1024
+    rag_answer_cache_ttl: float = 60.0
+    
+    # Concurrent RAG searches per Milvus request (1 disables batching)
+    rag_search_batch_size: int = 32
     
     # Default LLM
     default_llm_provider: str = "openai"
@@ -63,13 +82,21 @@ class Settings(BaseSettings):
     default_temperature: float = 0.7
     default_max_tokens: int = 2048
     
+    # LLM rate limits (per provider, shared by all instances)
+    llm_requests_per_minute: Optional[int] = None
+    llm_tokens_per_minute: Optional[int] = None
+    
     # Memory
     short_term_memory_size: int = 10
     long_term_memory_collection: str = "long_term_memory"
+    long_term_memory_batch_size: int = 64
+    long_term_memory_max_concurrency: int = 8
     
     # Fine-tuning
     finetune_output_dir: str = "./finetune_output"
     finetune_logging_dir: str = "./finetune_logs"
+    # Seconds the trained-model listing is cached between polls
+    finetune_models_cache_ttl: float = 5.0
     
     class Config:
         env_file = ".env"
@@ -3,7 +3,7 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from app.config import get_settings
@@ -22,7 +22,7 @@ from app.api.models import router as models_router
 from utils.logger import get_logger
 from utils.exceptions import AIAgentException
 
-logger = get_logger("main")
+logger = get_logger("main", debug=get_settings().debug)
 
 
 @asynccontextmanager
@@ -59,6 +59,7 @@ async def lifespan(app: FastAPI):
         await close_db()
     await cleanup()
     logger.info("Cleanup completed")
+    await logger.complete()
 
 
 def create_app() -> FastAPI:
@@ -73,6 +74,9 @@ def create_app() -> FastAPI:
         redoc_url="/redoc",
         openapi_url="/openapi.json",
         lifespan=lifespan,
+        # Route results are already reduced to JSON-compatible data by
+        # FastAPI; orjson encodes them several times faster than json.dumps
+        default_response_class=ORJSONResponse,
     )
     
     # CORS middleware
@@ -87,18 +91,19 @@ def create_app() -> FastAPI:
     # Exception handlers
     @app.exception_handler(AIAgentException)
     async def ai_agent_exception_handler(request: Request, exc: AIAgentException):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "error": exc.message,
                 "detail": exc.detail,
-                "type": exc.__class__.__name__
+                "type": exc.__class__.__name__,
+                "code": exc.code
             }
         )
     
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             content={
                 "error": "Validation error",
@@ -1,27 +1,229 @@
 """Base LLM interface."""
 
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, List, Optional, Dict, Any
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import AsyncGenerator, AsyncIterator, ClassVar, List, Optional, Dict, Any
+import httpx
+import tiktoken
 
+from app.config import get_settings
 
-class Message(BaseModel):
-    """Chat message model."""
+# Per-message framing tokens added by chat formats (role, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Shared HTTP/2 client for OpenAI-compatible providers
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Message:
+    """Chat message model.
+    
+    A plain slotted dataclass rather than a pydantic model: messages are
+    built for every history item on every turn from already-validated data.
+    """
     role: str  # system, user, assistant
     content: str
+    
+    def dict(self) -> Dict[str, str]:
+        """Return the message as a dict (pydantic-compatible shim)."""
+        return {"role": self.role, "content": self.content}
+    
+    model_dump = dict
 
 
-class LLMResponse(BaseModel):
+@dataclass(slots=True)
+class LLMResponse:
     """LLM response model."""
     content: str
     model: str
     usage: Optional[Dict[str, int]] = None
     finish_reason: Optional[str] = None
+    
+    def dict(self) -> Dict[str, Any]:
+        """Return the response as a dict (pydantic-compatible shim)."""
+        return asdict(self)
+    
+    model_dump = dict
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for LLM API calls.
+    
+    HTTP/2 multiplexes concurrent completions and streams over one
+    connection per host instead of one TCP/TLS connection per request.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=10,
+                max_connections=50,
+                keepalive_expiry=30.0
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoding for a model, falling back to cl100k_base."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=None)
+def get_model_encoding(model_name: str) -> Optional[tiktoken.Encoding]:
+    """Get the tiktoken encoding for a model tiktoken knows, or None.
+    
+    Unlike get_encoding there is no cl100k_base fallback, whose counts
+    would be wrong for other tokenizers. The first call for an encoding
+    may download its BPE file.
+    """
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_text_tokens(model_name: str, text: str) -> int:
+    """Count tokens with tiktoken, cached on (model, text).
+    
+    System prompts and history messages are re-sent every turn, so
+    repeated counts become a dict lookup instead of a full BPE encode.
+    """
+    return len(get_encoding(model_name).encode(text))
+
+
+class RateLimiter:
+    """Token-bucket limiter for requests and tokens per minute.
+    
+    Both buckets refill continuously. A 429 from the provider blocks the
+    limiter for the Retry-After period and slows the refill rate
+    exponentially; successful calls gradually restore it.
+    """
+    
+    MAX_BACKOFF = 32.0
+    
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._backoff = 1.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float):
+        """Add allowance accrued since the last refill."""
+        elapsed = (now - self._updated_at) / (60.0 * self._backoff)
+        self._updated_at = now
+        if self.requests_per_minute:
+            self._requests = min(
+                float(self.requests_per_minute),
+                self._requests + elapsed * self.requests_per_minute
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + elapsed * self.tokens_per_minute
+            )
+    
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """Seconds until one request with `tokens` tokens fits the budget."""
+        wait = self._blocked_until - now
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 * self._backoff / self.requests_per_minute)
+        if self.tokens_per_minute and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60.0 * self._backoff / self.tokens_per_minute)
+        return wait
+    
+    async def acquire(self, tokens: int = 0):
+        """Wait until a request with the given token estimate may be sent.
+        
+        Args:
+            tokens: Estimated prompt tokens for the request
+        """
+        if self.tokens_per_minute:
+            # A single oversized request must not wait forever
+            tokens = min(tokens, self.tokens_per_minute)
+        
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+    
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Record a 429 response from the provider.
+        
+        Args:
+            retry_after: Seconds from the Retry-After header, if any
+        """
+        self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+        delay = retry_after if retry_after is not None else self._backoff
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+    
+    def on_success(self):
+        """Record a successful call, relaxing any backoff."""
+        if self._backoff > 1.0:
+            self._backoff = max(1.0, self._backoff / 2)
+
+
+def _rate_limit_retry_after(error: Exception) -> Optional[float]:
+    """Return Retry-After seconds if the error is a 429, else None.
+    
+    Returns 0.0 for a 429 without a usable Retry-After header. Works for
+    openai and httpx errors, which both expose the HTTP response.
+    """
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status_code != 429:
+        return None
+    
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 0.0
 
 
 class BaseLLM(ABC):
     """Abstract base class for LLM providers."""
     
+    # Shared per provider so all instances draw from the same budget
+    _rate_limiters: ClassVar[Dict[str, RateLimiter]] = {}
+    
     def __init__(
         self,
         model_name: str,
@@ -34,6 +236,41 @@ class BaseLLM(ABC):
         self.max_tokens = max_tokens
         self.kwargs = kwargs
     
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        """Get the provider-wide rate limiter, if limits are configured."""
+        settings = get_settings()
+        if not (settings.llm_requests_per_minute or settings.llm_tokens_per_minute):
+            return None
+        
+        provider = self.get_provider_name()
+        limiter = self._rate_limiters.get(provider)
+        if limiter is None:
+            limiter = RateLimiter(
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute
+            )
+            self._rate_limiters[provider] = limiter
+        return limiter
+    
+    @asynccontextmanager
+    async def _rate_limited(self, messages: List[Message]) -> AsyncIterator[None]:
+        """Hold a rate limit slot around a provider call."""
+        limiter = self.rate_limiter
+        if limiter is None:
+            yield
+            return
+        
+        await limiter.acquire(self.count_messages(messages))
+        try:
+            yield
+        except Exception as e:
+            retry_after = _rate_limit_retry_after(e)
+            if retry_after is not None:
+                limiter.on_rate_limited(retry_after or None)
+            raise
+        limiter.on_success()
+    
     @abstractmethod
     async def generate(
         self,
@@ -76,3 +313,14 @@ class BaseLLM(ABC):
     def count_tokens(self, text: str) -> int:
         """Count tokens in text. Override for accurate counting."""
         return len(text) // 4  # Rough estimate
+    
+    def count_messages(self, messages: List[Message]) -> int:
+        """Count tokens for a list of chat messages.
+        
+        Args:
+            messages: List of chat messages
+            
+        Returns:
+            Token count including per-message overhead
+        """
+        return sum(self.count_tokens(m.content) for m in messages) + MESSAGE_TOKEN_OVERHEAD * len(messages)
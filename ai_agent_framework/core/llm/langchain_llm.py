@@ -2,58 +2,23 @@
 
 from typing import AsyncGenerator, List, Optional, Dict, Any
 from langchain_openai import ChatOpenAI
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
 
 from core.llm.base import BaseLLM, Message, LLMResponse
 from app.config import get_settings
 
 
-class LangChainLLM(BaseLLM):
-    """LLM implementation using LangChain 1.x ChatOpenAI.
+class _LangChainBase(BaseLLM):
+    """Shared BaseLLM implementation on top of a LangChain chat model.
     
-    This wrapper provides compatibility with our BaseLLM interface
-    while using the modern LangChain 1.x API internally.
-    
-    Features:
-    - Uses langchain_openai.ChatOpenAI
-    - Supports invoke/ainvoke (LangChain 1.x API)
-    - Supports streaming via astream
-    - Compatible with existing codebase
+    Subclasses only construct `self.chat_model` in `__init__`; message
+    conversion, generation, streaming and usage extraction live here.
     """
     
-    def __init__(
-        self,
-        model_name: str = "gpt-3.5-turbo",
-        temperature: float = 0.7,
-        max_tokens: int = 2048,
-        api_key: Optional[str] = None,
-        api_base: Optional[str] = None,
-        **kwargs
-    ):
-        """Initialize LangChain LLM.
-        
-        Args:
-            model_name: Model identifier (e.g., "gpt-3.5-turbo", "gpt-4")
-            temperature: Sampling temperature
-            max_tokens: Maximum tokens for generation
-            api_key: OpenAI API key (optional, uses env if not provided)
-            api_base: OpenAI API base URL (optional)
-            **kwargs: Additional parameters passed to ChatOpenAI
-        """
-        super().__init__(model_name, temperature, max_tokens, **kwargs)
-        settings = get_settings()
-        
-        self.chat_model = ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            api_key=api_key or settings.openai_api_key,
-            base_url=api_base or settings.openai_api_base,
-            **{k: v for k, v in kwargs.items() if k not in ['model_name', 'temperature', 'max_tokens']}
-        )
-        
-        self.output_parser = StrOutputParser()
+    chat_model: BaseChatModel
     
     def _convert_messages(self, messages: List[Message]) -> List[BaseMessage]:
         """Convert our Message format to LangChain message format."""
@@ -69,6 +34,35 @@ class LangChainLLM(BaseLLM):
                 lc_messages.append(HumanMessage(content=msg.content))
         return lc_messages
     
+    def _get_model(self, **kwargs) -> Runnable:
+        """Get the chat model, bound to per-call parameters if provided."""
+        if "temperature" in kwargs or "max_tokens" in kwargs:
+            return self.chat_model.bind(
+                temperature=kwargs.get("temperature", self.temperature),
+                max_tokens=kwargs.get("max_tokens", self.max_tokens)
+            )
+        return self.chat_model
+    
+    @staticmethod
+    def _extract_usage(response: BaseMessage) -> Dict[str, int]:
+        """Extract token usage from a LangChain response message."""
+        usage_metadata = getattr(response, "usage_metadata", None)
+        if usage_metadata:
+            return {
+                "prompt_tokens": usage_metadata.get("input_tokens", 0),
+                "completion_tokens": usage_metadata.get("output_tokens", 0),
+                "total_tokens": usage_metadata.get("total_tokens", 0),
+            }
+        
+        token_usage = response.response_metadata.get("token_usage") or {}
+        if not token_usage:
+            return {}
+        return {
+            "prompt_tokens": token_usage.get("prompt_tokens", token_usage.get("input_tokens", 0)),
+            "completion_tokens": token_usage.get("completion_tokens", token_usage.get("output_tokens", 0)),
+            "total_tokens": token_usage.get("total_tokens", 0),
+        }
+    
     async def generate(
         self,
         messages: List[Message],
@@ -79,38 +73,22 @@ class LangChainLLM(BaseLLM):
         Args:
             messages: List of conversation messages
             **kwargs: Additional generation parameters
-            
+        
         Returns:
             LLMResponse with generated content
         """
         lc_messages = self._convert_messages(messages)
-        
-        # Update model parameters if provided
-        model = self.chat_model
-        if "temperature" in kwargs or "max_tokens" in kwargs:
-            model = self.chat_model.bind(
-                temperature=kwargs.get("temperature", self.temperature),
-                max_tokens=kwargs.get("max_tokens", self.max_tokens)
-            )
+        model = self._get_model(**kwargs)
         
         # Use ainvoke (LangChain 1.x async API)
-        response = await model.ainvoke(lc_messages)
-        
-        # Extract usage info if available
-        usage = {}
-        if hasattr(response, 'response_metadata'):
-            token_usage = response.response_metadata.get('token_usage', {})
-            usage = {
-                "prompt_tokens": token_usage.get('prompt_tokens', 0),
-                "completion_tokens": token_usage.get('completion_tokens', 0),
-                "total_tokens": token_usage.get('total_tokens', 0),
-            }
+        async with self._rate_limited(messages):
+            response = await model.ainvoke(lc_messages)
         
         return LLMResponse(
             content=response.content,
             model=self.model_name,
-            usage=usage,
-            finish_reason="stop"
+            usage=self._extract_usage(response),
+            finish_reason=response.response_metadata.get("finish_reason") or "stop"
         )
     
     async def stream_generate(
@@ -123,27 +101,18 @@ class LangChainLLM(BaseLLM):
         Args:
             messages: List of conversation messages
             **kwargs: Additional generation parameters
-            
+        
         Yields:
             Response chunks as strings
         """
         lc_messages = self._convert_messages(messages)
-        
-        model = self.chat_model
-        if "temperature" in kwargs or "max_tokens" in kwargs:
-            model = self.chat_model.bind(
-                temperature=kwargs.get("temperature", self.temperature),
-                max_tokens=kwargs.get("max_tokens", self.max_tokens)
-            )
+        model = self._get_model(**kwargs)
         
         # Use astream (LangChain 1.x streaming API)
-        async for chunk in model.astream(lc_messages):
-            if chunk.content:
-                yield chunk.content
-    
-    def get_provider_name(self) -> str:
-        """Get provider name."""
-        return "langchain_openai"
+        async with self._rate_limited(messages):
+            async for chunk in model.astream(lc_messages):
+                if chunk.content:
+                    yield chunk.content
     
     def count_tokens(self, text: str) -> int:
         """Estimate token count.
@@ -155,7 +124,58 @@ class LangChainLLM(BaseLLM):
         return len(text) // 4
 
 
-class LangChainQwenLLM(BaseLLM):
+class LangChainLLM(_LangChainBase):
+    """LLM implementation using LangChain 1.x ChatOpenAI.
+    
+    This wrapper provides compatibility with our BaseLLM interface
+    while using the modern LangChain 1.x API internally.
+    
+    Features:
+    - Uses langchain_openai.ChatOpenAI
+    - Supports invoke/ainvoke (LangChain 1.x API)
+    - Supports streaming via astream
+    - Compatible with existing codebase
+    """
+    
+    def __init__(
+        self,
+        model_name: str = "gpt-3.5-turbo",
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        api_key: Optional[str] = None,
+        api_base: Optional[str] = None,
+        **kwargs
+    ):
+        """Initialize LangChain LLM.
+        
+        Args:
+            model_name: Model identifier (e.g., "gpt-3.5-turbo", "gpt-4")
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens for generation
+            api_key: OpenAI API key (optional, uses env if not provided)
+            api_base: OpenAI API base URL (optional)
+            **kwargs: Additional parameters passed to ChatOpenAI
+        """
+        super().__init__(model_name, temperature, max_tokens, **kwargs)
+        settings = get_settings()
+        
+        self.chat_model = ChatOpenAI(
+            model=model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            api_key=api_key or settings.openai_api_key,
+            base_url=api_base or settings.openai_api_base,
+            **{k: v for k, v in kwargs.items() if k not in ['model_name', 'temperature', 'max_tokens']}
+        )
+        
+        self.output_parser = StrOutputParser()
+    
+    def get_provider_name(self) -> str:
+        """Get provider name."""
+        return "langchain_openai"
+
+
+class LangChainQwenLLM(_LangChainBase):
     """Qwen LLM using LangChain 1.x with DashScope.
     
     Uses langchain_community for DashScope integration.
@@ -187,50 +207,5 @@ class LangChainQwenLLM(BaseLLM):
                 "Install with: pip install langchain-community"
             )
     
-    def _convert_messages(self, messages: List[Message]) -> List[BaseMessage]:
-        """Convert our Message format to LangChain message format."""
-        lc_messages = []
-        for msg in messages:
-            if msg.role == "system":
-                lc_messages.append(SystemMessage(content=msg.content))
-            elif msg.role == "user":
-                lc_messages.append(HumanMessage(content=msg.content))
-            elif msg.role == "assistant":
-                lc_messages.append(AIMessage(content=msg.content))
-            else:
-                lc_messages.append(HumanMessage(content=msg.content))
-        return lc_messages
-    
-    async def generate(
-        self,
-        messages: List[Message],
-        **kwargs
-    ) -> LLMResponse:
-        """Generate using Qwen via DashScope."""
-        lc_messages = self._convert_messages(messages)
-        response = await self.chat_model.ainvoke(lc_messages)
-        
-        return LLMResponse(
-            content=response.content,
-            model=self.model_name,
-            usage={},
-            finish_reason="stop"
-        )
-    
-    async def stream_generate(
-        self,
-        messages: List[Message],
-        **kwargs
-    ) -> AsyncGenerator[str, None]:
-        """Stream generate using Qwen."""
-        lc_messages = self._convert_messages(messages)
-        
-        async for chunk in self.chat_model.astream(lc_messages):
-            if chunk.content:
-                yield chunk.content
-    
     def get_provider_name(self) -> str:
         return "qwen_dashscope"
-    
-    def count_tokens(self, text: str) -> int:
-        return len(text) // 4
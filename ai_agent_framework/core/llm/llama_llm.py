@@ -1,11 +1,11 @@
 """LLaMA LLM implementation - supports both local and API modes."""
 
 from typing import AsyncGenerator, List, Optional
-import httpx
+from openai import AsyncOpenAI
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 
-from core.llm.base import BaseLLM, Message, LLMResponse
+from core.llm.base import BaseLLM, Message, LLMResponse, get_http_client
 from app.config import get_settings
 
 
@@ -39,10 +39,34 @@ class LLaMALLM(BaseLLM):
         
         self.model = None
         self.tokenizer = None
+        self._remote = not (use_local and self.model_path)
+        self._client: Optional[AsyncOpenAI] = None
+        self._client_http = None
         
-        if use_local and self.model_path:
+        if not self._remote:
             self._load_local_model(device, load_in_8bit, load_in_4bit)
     
+    @property
+    def client(self) -> Optional[AsyncOpenAI]:
+        """OpenAI-protocol client for API mode, or None for a local model.
+        
+        Rebuilt when the shared HTTP client has been closed and replaced,
+        e.g. after an app shutdown and restart.
+        """
+        if not self._remote:
+            return None
+        
+        http_client = get_http_client()
+        if self._client is None or self._client_http is not http_client:
+            # llama.cpp server and vLLM both expose the OpenAI protocol
+            self._client = AsyncOpenAI(
+                api_key="EMPTY",
+                base_url=f"{self.api_base.rstrip('/')}/v1",
+                http_client=http_client
+            )
+            self._client_http = http_client
+        return self._client
+    
     def _load_local_model(
         self,
         device: str,
@@ -134,26 +158,25 @@ class LLaMALLM(BaseLLM):
         **kwargs
     ) -> LLMResponse:
         """Generate using remote API (OpenAI-compatible)."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.api_base}/v1/chat/completions",
-                json={
-                    "model": self.model_name,
-                    "messages": [{"role": m.role, "content": m.content} for m in messages],
-                    "temperature": kwargs.get("temperature", self.temperature),
-                    "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-                },
+        async with self._rate_limited(messages):
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": m.role, "content": m.content} for m in messages],
+                temperature=kwargs.get("temperature", self.temperature),
+                max_tokens=kwargs.get("max_tokens", self.max_tokens),
                 timeout=120.0
             )
-            response.raise_for_status()
-            data = response.json()
-            
-            return LLMResponse(
-                content=data["choices"][0]["message"]["content"],
-                model=data.get("model", self.model_name),
-                usage=data.get("usage"),
-                finish_reason=data["choices"][0].get("finish_reason")
-            )
+        
+        return LLMResponse(
+            content=response.choices[0].message.content or "",
+            model=response.model or self.model_name,
+            usage={
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens,
+            } if response.usage else None,
+            finish_reason=response.choices[0].finish_reason
+        )
     
     async def stream_generate(
         self,
@@ -168,28 +191,22 @@ class LLaMALLM(BaseLLM):
                 yield char
         else:
             # Stream from API
-            async with httpx.AsyncClient() as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.api_base}/v1/chat/completions",
-                    json={
-                        "model": self.model_name,
-                        "messages": [{"role": m.role, "content": m.content} for m in messages],
-                        "temperature": kwargs.get("temperature", self.temperature),
-                        "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-                        "stream": True,
-                    },
+            async with self._rate_limited(messages):
+                stream = await self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": m.role, "content": m.content} for m in messages],
+                    temperature=kwargs.get("temperature", self.temperature),
+                    max_tokens=kwargs.get("max_tokens", self.max_tokens),
+                    stream=True,
                     timeout=120.0
-                ) as response:
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]
-                            if data != "[DONE]":
-                                import json
-                                chunk = json.loads(data)
-                                content = chunk["choices"][0]["delta"].get("content", "")
-                                if content:
-                                    yield content
+                )
+            
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
     
     def get_provider_name(self) -> str:
         """Get provider name."""
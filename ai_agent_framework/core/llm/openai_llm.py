@@ -1,10 +1,9 @@
 """OpenAI LLM implementation."""
 
 from typing import AsyncGenerator, List, Optional
-import tiktoken
 from openai import AsyncOpenAI
 
-from core.llm.base import BaseLLM, Message, LLMResponse
+from core.llm.base import BaseLLM, Message, LLMResponse, count_text_tokens, get_encoding, get_http_client
 from app.config import get_settings
 
 
@@ -22,14 +21,28 @@ class OpenAILLM(BaseLLM):
     ):
         super().__init__(model_name, temperature, max_tokens, **kwargs)
         settings = get_settings()
-        self.client = AsyncOpenAI(
-            api_key=api_key or settings.openai_api_key,
-            base_url=api_base or settings.openai_api_base
-        )
-        try:
-            self.encoding = tiktoken.encoding_for_model(model_name)
-        except KeyError:
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.api_key = api_key or settings.openai_api_key
+        self.api_base = api_base or settings.openai_api_base
+        self._client: Optional[AsyncOpenAI] = None
+        self._client_http = None
+        self.encoding = get_encoding(model_name)
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        """OpenAI client on the current shared HTTP client.
+        
+        Rebuilt when the shared client has been closed and replaced,
+        e.g. after an app shutdown and restart.
+        """
+        http_client = get_http_client()
+        if self._client is None or self._client_http is not http_client:
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.api_base,
+                http_client=http_client
+            )
+            self._client_http = http_client
+        return self._client
     
     async def generate(
         self,
@@ -37,13 +50,14 @@ class OpenAILLM(BaseLLM):
         **kwargs
     ) -> LLMResponse:
         """Generate response using OpenAI API."""
-        response = await self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[{"role": m.role, "content": m.content} for m in messages],
-            temperature=kwargs.get("temperature", self.temperature),
-            max_tokens=kwargs.get("max_tokens", self.max_tokens),
-            **{k: v for k, v in kwargs.items() if k not in ["temperature", "max_tokens"]}
-        )
+        async with self._rate_limited(messages):
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": m.role, "content": m.content} for m in messages],
+                temperature=kwargs.get("temperature", self.temperature),
+                max_tokens=kwargs.get("max_tokens", self.max_tokens),
+                **{k: v for k, v in kwargs.items() if k not in ["temperature", "max_tokens"]}
+            )
         
         return LLMResponse(
             content=response.choices[0].message.content or "",
@@ -62,18 +76,23 @@ class OpenAILLM(BaseLLM):
         **kwargs
     ) -> AsyncGenerator[str, None]:
         """Stream generate responses using OpenAI API."""
-        stream = await self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[{"role": m.role, "content": m.content} for m in messages],
-            temperature=kwargs.get("temperature", self.temperature),
-            max_tokens=kwargs.get("max_tokens", self.max_tokens),
-            stream=True,
-            **{k: v for k, v in kwargs.items() if k not in ["temperature", "max_tokens"]}
-        )
+        async with self._rate_limited(messages):
+            stream = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": m.role, "content": m.content} for m in messages],
+                temperature=kwargs.get("temperature", self.temperature),
+                max_tokens=kwargs.get("max_tokens", self.max_tokens),
+                stream=True,
+                **{k: v for k, v in kwargs.items() if k not in ["temperature", "max_tokens"]}
+            )
         
         async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            # Usage-only chunks arrive with an empty choices list
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
     
     def get_provider_name(self) -> str:
         """Get provider name."""
@@ -81,4 +100,4 @@ class OpenAILLM(BaseLLM):
     
     def count_tokens(self, text: str) -> int:
         """Count tokens using tiktoken."""
-        return len(self.encoding.encode(text))
+        return count_text_tokens(self.model_name, text)
@@ -6,6 +6,22 @@ from dashscope import Generation
 
 from core.llm.base import BaseLLM, Message, LLMResponse
 from app.config import get_settings
+from utils.exceptions import LLMException
+
+
+class QwenAPIError(LLMException):
+    """Error response from the DashScope API.
+    
+    DashScope returns errors instead of raising them; `status_code` lets
+    the rate limiter recognise a 429.
+    """
+    
+    def __init__(self, response):
+        super().__init__(
+            f"Qwen API error: {response.code} - {response.message}",
+            detail={"code": response.code}
+        )
+        self.status_code = response.status_code
 
 
 class QwenLLM(BaseLLM):
@@ -36,27 +52,28 @@ class QwenLLM(BaseLLM):
         **kwargs
     ) -> LLMResponse:
         """Generate response using DashScope API."""
-        response = Generation.call(
-            model=self.model_name,
-            messages=[{"role": m.role, "content": m.content} for m in messages],
-            temperature=kwargs.get("temperature", self.temperature),
-            max_tokens=kwargs.get("max_tokens", self.max_tokens),
-            result_format="message",
-        )
-        
-        if response.status_code == 200:
-            return LLMResponse(
-                content=response.output.choices[0].message.content,
+        async with self._rate_limited(messages):
+            response = Generation.call(
                 model=self.model_name,
-                usage={
-                    "prompt_tokens": response.usage.get("input_tokens", 0),
-                    "completion_tokens": response.usage.get("output_tokens", 0),
-                    "total_tokens": response.usage.get("total_tokens", 0),
-                },
-                finish_reason=response.output.choices[0].finish_reason
+                messages=[{"role": m.role, "content": m.content} for m in messages],
+                temperature=kwargs.get("temperature", self.temperature),
+                max_tokens=kwargs.get("max_tokens", self.max_tokens),
+                result_format="message",
             )
-        else:
-            raise Exception(f"Qwen API error: {response.code} - {response.message}")
+            # Raise inside the limiter so a 429 response backs it off
+            if response.status_code != 200:
+                raise QwenAPIError(response)
+        
+        return LLMResponse(
+            content=response.output.choices[0].message.content,
+            model=self.model_name,
+            usage={
+                "prompt_tokens": response.usage.get("input_tokens", 0),
+                "completion_tokens": response.usage.get("output_tokens", 0),
+                "total_tokens": response.usage.get("total_tokens", 0),
+            },
+            finish_reason=response.output.choices[0].finish_reason
+        )
     
     async def stream_generate(
         self,
@@ -64,23 +81,24 @@ class QwenLLM(BaseLLM):
         **kwargs
     ) -> AsyncGenerator[str, None]:
         """Stream generate responses using DashScope API."""
-        responses = Generation.call(
-            model=self.model_name,
-            messages=[{"role": m.role, "content": m.content} for m in messages],
-            temperature=kwargs.get("temperature", self.temperature),
-            max_tokens=kwargs.get("max_tokens", self.max_tokens),
-            result_format="message",
-            stream=True,
-            incremental_output=True,
-        )
-        
-        for response in responses:
-            if response.status_code == 200:
+        async with self._rate_limited(messages):
+            responses = Generation.call(
+                model=self.model_name,
+                messages=[{"role": m.role, "content": m.content} for m in messages],
+                temperature=kwargs.get("temperature", self.temperature),
+                max_tokens=kwargs.get("max_tokens", self.max_tokens),
+                result_format="message",
+                stream=True,
+                incremental_output=True,
+            )
+            
+            # The request is only sent once iteration starts
+            for response in responses:
+                if response.status_code != 200:
+                    raise QwenAPIError(response)
                 content = response.output.choices[0].message.content
                 if content:
                     yield content
-            else:
-                raise Exception(f"Qwen API error: {response.code} - {response.message}")
     
     def get_provider_name(self) -> str:
         """Get provider name."""
@@ -1,25 +1,54 @@
 """Base Memory interface."""
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from pydantic import BaseModel, Field
+import sys
 import uuid
 
 
-class MemoryItem(BaseModel):
-    """Memory item model."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+@dataclass(slots=True, kw_only=True)
+class MemoryItem:
+    """Memory item model.
+    
+    A slotted dataclass rather than a pydantic model: items are built on
+    every turn and every search hit from already-validated data. Input is
+    validated at the HTTP boundary by the schemas in `schemas.memory`.
+    """
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
     content: str
     role: str = "user"  # user, assistant, system
-    metadata: Dict[str, Any] = {}
-    timestamp: datetime = Field(default_factory=datetime.now)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    timestamp: datetime = field(default_factory=datetime.now)
     importance: float = 0.5  # 0-1 scale for memory importance
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
+    _timestamp_iso: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Ids are dict/set keys across short-term, long-term and merges;
+        # interning lets equal ids compare by identity
+        self.id = sys.intern(self.id)
+    
+    @property
+    def timestamp_iso(self) -> str:
+        """ISO-8601 timestamp, formatted once per item."""
+        if self._timestamp_iso is None:
+            self._timestamp_iso = self.timestamp.isoformat()
+        return self._timestamp_iso
+    
+    def dict(self) -> Dict[str, Any]:
+        """Return the item as a dict (pydantic-compatible shim)."""
+        return {
+            "id": self.id,
+            "content": self.content,
+            "role": self.role,
+            "metadata": self.metadata,
+            "timestamp": self.timestamp,
+            "importance": self.importance,
         }
+    
+    model_dump = dict
 
 
 class BaseMemory(ABC):
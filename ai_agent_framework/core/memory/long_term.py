@@ -1,35 +1,111 @@
 """Long-term memory implementation using vector store."""
 
-from typing import List, Optional, Dict, Any
+from dataclasses import replace
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
+import asyncio
 import json
+import time
+
+import numpy as np
 
 from core.memory.base import BaseMemory, MemoryItem
 from core.vector_store.base import BaseVectorStore, Document
 from core.rag.embeddings import EmbeddingModel
 from app.config import get_settings
+from utils.cache import TTLCache
+
+
+def _to_memory_item(item_id: str, content: str, metadata: Dict[str, Any]) -> MemoryItem:
+    """Build a MemoryItem from stored content and metadata.
+    
+    The role/timestamp/importance keys are popped back into fields.
+    """
+    metadata = dict(metadata) if metadata else {}
+    role = metadata.pop("role", "user")
+    timestamp = metadata.pop("timestamp", None)
+    importance = metadata.pop("importance", 0.5)
+    
+    item = MemoryItem(
+        id=item_id,
+        content=content,
+        role=role,
+        timestamp=datetime.fromisoformat(timestamp) if timestamp else datetime.now(),
+        importance=importance,
+        metadata=metadata
+    )
+    if timestamp:
+        item._timestamp_iso = timestamp
+    return item
+
+
+def _copy_item(item: MemoryItem) -> MemoryItem:
+    """Copy a cached item so callers can't modify the cached one."""
+    copy = replace(item, metadata=dict(item.metadata))
+    copy._timestamp_iso = item._timestamp_iso
+    return copy
+
+
+# Write generation per collection. There is one LongTermMemory per session
+# on a shared collection; cache entries carry the generation they were
+# made in, so a write through any instance invalidates all of them.
+_collection_generations: Dict[str, int] = {}
 
 
 class LongTermMemory(BaseMemory):
     """Long-term memory using vector store for semantic search."""
     
+    # Stats callers don't need exact counts; avoid a store round-trip per call
+    COUNT_CACHE_TTL = 1.0
+    # Scalar queries are unordered, so fetch extra rows to sort by timestamp
+    RECENT_OVERFETCH = 4
+    
     def __init__(
         self,
         vector_store: BaseVectorStore,
         embedding_model: EmbeddingModel,
         collection_name: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        query_cache_size: int = 1024,
+        query_cache_ttl: float = 300.0
     ):
         settings = get_settings()
         self.vector_store = vector_store
         self.embedding_model = embedding_model
         self.collection_name = collection_name or settings.long_term_memory_collection
         self.user_id = user_id
+        self.batch_size = settings.long_term_memory_batch_size
+        self.max_concurrency = settings.long_term_memory_max_concurrency
         self._initialized = False
+        self._init_lock = asyncio.Lock()
+        # Repeated agent-loop queries skip both embedding and vector search
+        self._query_cache = TTLCache(max_entries=query_cache_size, ttl=query_cache_ttl)
+        self._count_cache: Optional[int] = None
+        self._count_cached_at = 0.0
+        self._count_generation = 0
+    
+    @property
+    def _generation(self) -> int:
+        return _collection_generations.get(self.collection_name, 0)
+    
+    def invalidate(self):
+        """Drop cached search results and counts after the collection changes.
+        
+        Also invalidates the caches of other instances on the collection.
+        """
+        _collection_generations[self.collection_name] = self._generation + 1
+        self._query_cache.clear()
+        self._count_cache = None
     
     async def _ensure_collection(self):
-        """Ensure collection exists."""
-        if not self._initialized:
+        """Ensure collection exists.
+        
+        Callers check `self._initialized` first so the common path costs no
+        await; the lock keeps concurrent first calls from racing to create.
+        """
+        async with self._init_lock:
+            if self._initialized:
+                return
             exists = await self.vector_store.collection_exists(self.collection_name)
             if not exists:
                 await self.vector_store.create_collection(
@@ -38,23 +114,36 @@ class LongTermMemory(BaseMemory):
                 )
             self._initialized = True
     
-    def _item_to_document(self, item: MemoryItem) -> Document:
-        """Convert MemoryItem to Document."""
+    def _item_to_document(
+        self,
+        item: MemoryItem,
+        embedding: Optional[List[float]] = None
+    ) -> Document:
+        """Convert MemoryItem to Document.
+        
+        Args:
+            item: MemoryItem to convert
+            embedding: Precomputed embedding, embedded on demand if None
+        
+        Returns:
+            Document ready for insertion
+        """
         # Create searchable content
         content = item.content
         
         # Build metadata
         metadata = {
+            **item.metadata,
             "role": item.role,
-            "timestamp": item.timestamp.isoformat(),
+            "timestamp": item.timestamp_iso,
             "importance": item.importance,
-            **item.metadata
         }
         if self.user_id:
             metadata["user_id"] = self.user_id
         
         # Generate embedding
-        embedding = self.embedding_model.embed_query(content)
+        if embedding is None:
+            embedding = self.embedding_model.embed_query(content)
         
         return Document(
             id=item.id,
@@ -65,23 +154,26 @@ class LongTermMemory(BaseMemory):
     
     def _document_to_item(self, doc: Document) -> MemoryItem:
         """Convert Document to MemoryItem."""
-        metadata = doc.metadata.copy()
-        
-        return MemoryItem(
-            id=doc.id,
-            content=doc.content,
-            role=metadata.pop("role", "user"),
-            timestamp=datetime.fromisoformat(metadata.pop("timestamp", datetime.now().isoformat())),
-            importance=metadata.pop("importance", 0.5),
-            metadata=metadata
-        )
+        return _to_memory_item(doc.id, doc.content, doc.metadata)
     
     async def add(self, item: MemoryItem) -> str:
         """Add item to long-term memory."""
-        await self._ensure_collection()
+        return await self.add_document(self._item_to_document(item))
+    
+    async def add_document(self, doc: Document) -> str:
+        """Add an already-converted document to long-term memory.
+        
+        Args:
+            doc: Document from `_item_to_document`, with embedding
+        
+        Returns:
+            Item ID
+        """
+        if not self._initialized:
+            await self._ensure_collection()
         
-        doc = self._item_to_document(item)
         ids = await self.vector_store.insert(self.collection_name, [doc])
+        self.invalidate()
         return ids[0]
     
     async def add_batch(self, items: List[MemoryItem]) -> List[str]:
@@ -89,18 +181,46 @@ class LongTermMemory(BaseMemory):
         
         Args:
             items: List of MemoryItems
-            
+        
         Returns:
             List of item IDs
         """
-        await self._ensure_collection()
+        if not items:
+            return []
+        
+        if not self._initialized:
+            await self._ensure_collection()
+        
+        # One batched embedding call instead of one call per item
+        embeddings = self.embedding_model.embed_documents([item.content for item in items])
+        docs = [
+            self._item_to_document(item, embedding)
+            for item, embedding in zip(items, embeddings)
+        ]
+        
+        if len(docs) <= self.batch_size:
+            ids = await self.vector_store.insert(self.collection_name, docs)
+            self.invalidate()
+            return ids
+        
+        # Upload fixed-size chunks concurrently to hide per-request RTT
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def _insert_chunk(chunk: List[Document]) -> List[str]:
+            async with semaphore:
+                return await self.vector_store.insert(self.collection_name, chunk)
         
-        docs = [self._item_to_document(item) for item in items]
-        return await self.vector_store.insert(self.collection_name, docs)
+        results = await asyncio.gather(*(
+            _insert_chunk(docs[i:i + self.batch_size])
+            for i in range(0, len(docs), self.batch_size)
+        ))
+        self.invalidate()
+        return [doc_id for ids in results for doc_id in ids]
     
     async def get(self, item_id: str) -> Optional[MemoryItem]:
         """Get item by ID."""
-        await self._ensure_collection()
+        if not self._initialized:
+            await self._ensure_collection()
         
         docs = await self.vector_store.get_by_ids(self.collection_name, [item_id])
         if docs:
@@ -116,15 +236,26 @@ class LongTermMemory(BaseMemory):
         **kwargs
     ) -> List[MemoryItem]:
         """Semantic search in memory."""
-        await self._ensure_collection()
+        if not self._initialized:
+            await self._ensure_collection()
         
         # Add user filter if user_id is set
         if self.user_id:
-            filters = filters or {}
-            filters["user_id"] = self.user_id
+            filters = {**(filters or {}), "user_id": self.user_id}
+        
+        cache_key = (
+            self._generation,
+            query,
+            limit,
+            min_score,
+            repr(sorted(filters.items())) if filters else None
+        )
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return [_copy_item(item) for item in cached]
         
         # Embed query
-        query_vector = self.embedding_model.embed_query(query)
+        query_vector = await self.embedding_model.aembed_query(query)
         
         # Search
         results = await self.vector_store.search(
@@ -135,84 +266,155 @@ class LongTermMemory(BaseMemory):
         )
         
         # Filter by score and convert to MemoryItems
-        items = []
-        for result in results:
-            if result.score >= min_score:
-                items.append(MemoryItem(
-                    id=result.id,
-                    content=result.content,
-                    role=result.metadata.get("role", "user"),
-                    timestamp=datetime.fromisoformat(
-                        result.metadata.get("timestamp", datetime.now().isoformat())
-                    ),
-                    importance=result.metadata.get("importance", 0.5),
-                    metadata={
-                        k: v for k, v in result.metadata.items()
-                        if k not in ["role", "timestamp", "importance"]
-                    }
-                ))
-        
-        return items
+        items = [
+            _to_memory_item(result.id, result.content, result.metadata)
+            for result in results
+            if result.score >= min_score
+        ]
+        self._query_cache.set(cache_key, items)
+        return [_copy_item(item) for item in items]
     
     async def delete(self, item_id: str) -> bool:
         """Delete item by ID."""
-        await self._ensure_collection()
-        return await self.vector_store.delete(self.collection_name, [item_id])
+        if not self._initialized:
+            await self._ensure_collection()
+        deleted = await self.vector_store.delete(self.collection_name, [item_id])
+        self.invalidate()
+        return deleted
     
     async def clear(self) -> bool:
         """Clear all memory (drops and recreates collection)."""
         await self.vector_store.drop_collection(self.collection_name)
+        self.invalidate()
         self._initialized = False
         await self._ensure_collection()
         return True
     
     async def get_recent(self, limit: int = 10) -> List[MemoryItem]:
-        """Get recent items (requires querying all and sorting)."""
-        await self._ensure_collection()
+        """Get recent items (queries metadata and sorts by timestamp)."""
+        if not self._initialized:
+            await self._ensure_collection()
         
-        # Use a generic query to get items
-        results = await self.search("", limit=limit * 2)
+        # Metadata-only query: no query embedding and no ANN search
+        filters = {"user_id": self.user_id} if self.user_id else None
+        docs = await self.vector_store.get_by_filter(
+            self.collection_name,
+            filters=filters,
+            limit=limit * self.RECENT_OVERFETCH
+        )
         
         # Sort by timestamp
+        results = [self._document_to_item(doc) for doc in docs]
         results.sort(key=lambda x: x.timestamp, reverse=True)
         return results[:limit]
     
     async def count(self) -> int:
         """Get memory count."""
-        await self._ensure_collection()
+        now = time.monotonic()
+        generation = self._generation
+        if (
+            self._count_cache is not None
+            and self._count_generation == generation
+            and now - self._count_cached_at < self.COUNT_CACHE_TTL
+        ):
+            return self._count_cache
+        
+        if not self._initialized:
+            await self._ensure_collection()
         
         # This is a rough count from the vector store
-        from pymilvus import Collection
         try:
-            collection = Collection(self.collection_name)
-            return collection.num_entities
+            count = await self.vector_store.count(self.collection_name)
         except Exception:
             return 0
+        
+        self._count_cache = count
+        self._count_cached_at = now
+        self._count_generation = generation
+        return count
+    
+    async def scan_metadata(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        min_importance: Optional[float] = None
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Scan ids, importances and timestamps of all matching memories.
+        
+        Content and embeddings are not fetched.
+        
+        Args:
+            filters: Optional metadata filters
+            min_importance: Only scan memories at least this important
+        
+        Returns:
+            Item IDs, importances (float64) and timestamps (datetime64,
+            NaT where missing), in the same order
+        """
+        if not self._initialized:
+            await self._ensure_collection()
+        
+        if self.user_id:
+            filters = {**(filters or {}), "user_id": self.user_id}
+        min_values = {"importance": min_importance} if min_importance is not None else None
+        
+        ids, metadatas = await self.vector_store.scan_metadata(
+            self.collection_name,
+            filters=filters,
+            min_values=min_values
+        )
+        importances = np.fromiter(
+            (metadata.get("importance", 0.5) for metadata in metadatas),
+            dtype=np.float64,
+            count=len(metadatas)
+        )
+        timestamps = np.array(
+            [metadata.get("timestamp") or "NaT" for metadata in metadatas],
+            dtype="datetime64[us]"
+        )
+        return ids, importances, timestamps
     
     async def get_by_importance(
         self,
         min_importance: float = 0.7,
         limit: int = 10
     ) -> List[MemoryItem]:
-        """Get high-importance memories.
+        """Get high-importance memories, most important (then newest) first.
         
         Args:
             min_importance: Minimum importance threshold
             limit: Max items to return
-            
+        
         Returns:
             List of important memories
         """
-        await self._ensure_collection()
+        if limit <= 0:
+            return []
         
-        # Search with importance filter
-        results = await self.search(
-            "",
-            limit=limit,
-            filters={"importance": {"$gte": min_importance}}
-        )
+        # Rank a metadata-only scan in numpy; fetch content for the winners only
+        ids, importances, timestamps = await self.scan_metadata(min_importance=min_importance)
+        selected = np.flatnonzero(importances >= min_importance)
+        if len(selected) > limit:
+            # Keep rows tied with the limit-th importance for the timestamp order
+            cutoff = -np.partition(-importances[selected], limit - 1)[limit - 1]
+            selected = selected[importances[selected] >= cutoff]
+        # Importance, then timestamp, descending; NaT is the smallest int64
+        selected = selected[np.lexsort((
+            timestamps[selected].astype(np.int64),
+            importances[selected]
+        ))[::-1][:limit]]
+        if not len(selected):
+            return []
         
-        return results
+        docs = await self.vector_store.get_by_ids(
+            self.collection_name,
+            [ids[i] for i in selected]
+        )
+        by_id = {doc.id: doc for doc in docs}
+        return [
+            self._document_to_item(by_id[ids[i]])
+            for i in selected
+            if ids[i] in by_id
+        ]
     
     async def consolidate_memories(
         self,
@@ -224,10 +426,12 @@ class LongTermMemory(BaseMemory):
         Args:
             items: Items to consolidate
             summary: Summary text
-            
+        
         Returns:
             New consolidated memory ID
         """
+        source_ids = [item.id for item in items]
+        
         # Create consolidated memory
         consolidated = MemoryItem(
             content=summary,
@@ -235,15 +439,16 @@ class LongTermMemory(BaseMemory):
             importance=0.8,
             metadata={
                 "type": "consolidated",
-                "source_ids": [item.id for item in items]
+                "source_ids": source_ids
             }
         )
         
         # Add consolidated memory
         new_id = await self.add(consolidated)
         
-        # Optionally delete original items
-        for item in items:
-            await self.delete(item.id)
+        # Delete original items in one request
+        if source_ids:
+            await self.vector_store.delete(self.collection_name, source_ids)
+            self.invalidate()
         
         return new_id
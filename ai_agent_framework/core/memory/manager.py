@@ -2,6 +2,9 @@
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+import asyncio
+from heapq import nlargest
+from itertools import chain
 
 from core.memory.base import MemoryItem
 from core.memory.short_term import ShortTermMemory
@@ -9,6 +12,11 @@ from core.memory.long_term import LongTermMemory
 from core.llm.base import BaseLLM, Message
 
 
+async def _no_results() -> List[MemoryItem]:
+    """Stand-in for a skipped memory search."""
+    return []
+
+
 class MemoryManager:
     """Unified memory manager combining short and long-term memory."""
     
@@ -93,18 +101,25 @@ class MemoryManager:
     async def get_conversation_history(
         self,
         max_turns: Optional[int] = None,
-        max_tokens: int = 4000
+        max_tokens: int = 4000,
+        use_tiktoken: bool = False
     ) -> List[Message]:
         """Get conversation history for LLM context.
         
         Args:
             max_turns: Maximum conversation turns
             max_tokens: Maximum token budget
+            use_tiktoken: Count exact tokens for the LLM's model instead
+                of estimating from characters
             
         Returns:
             List of Message objects
         """
-        items = await self.short_term.get_context_window(max_tokens)
+        items = await self.short_term.get_context_window(
+            max_tokens,
+            use_tiktoken=use_tiktoken,
+            model_name=self.llm.model_name if self.llm else None
+        )
         
         if max_turns:
             # Ensure we get complete turns
@@ -130,23 +145,18 @@ class MemoryManager:
         Returns:
             Combined search results
         """
-        results = []
-        
-        if include_short_term:
-            short_results = await self.short_term.search(query, limit=limit)
-            results.extend(short_results)
+        # Both stores are independent; the long-term search dominates latency
+        short_results, long_results = await asyncio.gather(
+            self.short_term.search(query, limit=limit) if include_short_term else _no_results(),
+            self.long_term.search(query, limit=limit) if include_long_term else _no_results(),
+        )
         
-        if include_long_term:
-            long_results = await self.long_term.search(query, limit=limit)
-            # Avoid duplicates
-            existing_ids = {r.id for r in results}
-            for item in long_results:
-                if item.id not in existing_ids:
-                    results.append(item)
+        # Deduplicate by id (short-term copy wins), then take the newest
+        combined: Dict[str, MemoryItem] = {}
+        for item in chain(short_results, long_results):
+            combined.setdefault(item.id, item)
         
-        # Sort by timestamp and limit
-        results.sort(key=lambda x: x.timestamp, reverse=True)
-        return results[:limit]
+        return nlargest(limit, combined.values(), key=lambda x: x.timestamp)
     
     async def get_relevant_context(
         self,
@@ -164,8 +174,10 @@ class MemoryManager:
         Returns:
             Dict with 'short_term' and 'long_term' lists
         """
-        short_results = await self.short_term.get_recent(short_term_count)
-        long_results = await self.long_term.search(query, limit=long_term_count)
+        short_results, long_results = await asyncio.gather(
+            self.short_term.get_recent(short_term_count),
+            self.long_term.search(query, limit=long_term_count),
+        )
         
         return {
             "short_term": short_results,
@@ -187,16 +199,17 @@ class MemoryManager:
             Number of items archived
         """
         items = await self.short_term.get_all()
-        archived = 0
+        wanted = set(item_ids) if item_ids else None
+        to_archive = [
+            item for item in items
+            if (wanted is None or item.id in wanted)
+            and item.importance >= importance_threshold
+        ]
         
-        for item in items:
-            if item_ids and item.id not in item_ids:
-                continue
-            if item.importance >= importance_threshold:
-                await self.long_term.add(item)
-                archived += 1
+        if to_archive:
+            await self.long_term.add_batch(to_archive)
         
-        return archived
+        return len(to_archive)
     
     async def summarize_and_archive(
         self,
@@ -264,8 +277,13 @@ class MemoryManager:
         Returns:
             Dict with memory stats
         """
+        short_term_count, long_term_count = await asyncio.gather(
+            self.short_term.count(),
+            self.long_term.count(),
+        )
+        
         return {
-            "short_term_count": await self.short_term.count(),
-            "long_term_count": await self.long_term.count(),
+            "short_term_count": short_term_count,
+            "long_term_count": long_term_count,
             "short_term_max_size": self.short_term.max_size,
         }
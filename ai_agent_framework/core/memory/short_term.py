@@ -1,13 +1,23 @@
 """Short-term memory implementation using in-memory storage."""
 
-from typing import List, Optional, Dict
-from collections import deque
+import asyncio
+from typing import Iterable, Iterator, List, Optional, Dict, Set
+from collections import defaultdict, deque
 from datetime import datetime
+from itertools import islice
 
 from core.memory.base import BaseMemory, MemoryItem
+import tiktoken
+
+from core.llm.base import get_model_encoding
 from app.config import get_settings
 
 
+def _trigrams(text: str) -> Set[str]:
+    """Get the set of character trigrams in text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
 class ShortTermMemory(BaseMemory):
     """Short-term memory using deque for sliding window."""
     
@@ -21,20 +31,74 @@ class ShortTermMemory(BaseMemory):
         self.session_id = session_id
         self._memory: deque[MemoryItem] = deque(maxlen=self.max_size)
         self._index: Dict[str, MemoryItem] = {}
+        # Ids of deleted items still held in the deque until the next compaction
+        self._tombstones: Set[str] = set()
+        # Search index: lowercased content and trigram -> item ids
+        self._lowered: Dict[str, str] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        # Exact token counts per item id for the model last counted with
+        self._token_counts: Dict[str, int] = {}
+        self._token_model: Optional[str] = None
+    
+    def _live(self, items: Iterable[MemoryItem]) -> Iterator[MemoryItem]:
+        """Filter out deleted (tombstoned) items."""
+        tombstones = self._tombstones
+        if not tombstones:
+            return iter(items)
+        return (item for item in items if item.id not in tombstones)
+    
+    def _compact(self):
+        """Rebuild the deque without tombstoned items."""
+        self._memory = deque(self._live(self._memory), maxlen=self.max_size)
+        self._tombstones.clear()
+    
+    def _index_content(self, item: MemoryItem):
+        """Add an item's content to the search index."""
+        lowered = item.content.lower()
+        self._lowered[item.id] = lowered
+        for gram in _trigrams(lowered):
+            self._postings[gram].add(item.id)
+    
+    def _unindex_content(self, item_id: str):
+        """Remove an item's content from the search index."""
+        lowered = self._lowered.pop(item_id, None)
+        if lowered is None:
+            return
+        for gram in _trigrams(lowered):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(item_id)
+                if not posting:
+                    del self._postings[gram]
+    
+    def _maybe_compact(self):
+        """Compact once tombstones exceed a quarter of the deque."""
+        if len(self._tombstones) * 4 > len(self._memory):
+            self._compact()
     
     async def add(self, item: MemoryItem) -> str:
         """Add item to short-term memory."""
-        # Add session_id to metadata
-        if self.session_id:
-            item.metadata["session_id"] = self.session_id
+        # Add session_id to metadata; copy so the caller's dict isn't mutated
+        if self.session_id and item.metadata.get("session_id") != self.session_id:
+            item.metadata = {**item.metadata, "session_id": self.session_id}
+        
+        # Drop tombstones before evicting a live item for the new one, or
+        # before re-adding a deleted id so its stale slot stays hidden
+        if self._tombstones and (
+            item.id in self._tombstones or len(self._memory) >= self.max_size
+        ):
+            self._compact()
         
         # Remove from index if it will be evicted
         if len(self._memory) >= self.max_size:
             evicted = self._memory[0]
             self._index.pop(evicted.id, None)
+            self._unindex_content(evicted.id)
+            self._token_counts.pop(evicted.id, None)
         
         self._memory.append(item)
         self._index[item.id] = item
+        self._index_content(item)
         return item.id
     
     async def get(self, item_id: str) -> Optional[MemoryItem]:
@@ -47,12 +111,29 @@ class ShortTermMemory(BaseMemory):
         limit: int = 5,
         **kwargs
     ) -> List[MemoryItem]:
-        """Search memory by content (simple substring match)."""
+        """Search memory by content (case-insensitive substring match).
+        
+        Queries of three or more characters are narrowed to candidates
+        containing every query trigram before the substring check.
+        """
         query_lower = query.lower()
+        lowered = self._lowered
         results = []
         
-        for item in reversed(list(self._memory)):
-            if query_lower in item.content.lower():
+        candidates = None
+        if len(query_lower) >= 3:
+            postings = sorted(
+                (self._postings.get(gram, ()) for gram in _trigrams(query_lower)),
+                key=len
+            )
+            if not postings[0]:
+                return results
+            candidates = set(postings[0]).intersection(*postings[1:])
+        
+        for item in self._live(reversed(self._memory)):
+            if candidates is not None and item.id not in candidates:
+                continue
+            if query_lower in lowered[item.id]:
                 results.append(item)
                 if len(results) >= limit:
                     break
@@ -61,35 +142,37 @@ class ShortTermMemory(BaseMemory):
     
     async def delete(self, item_id: str) -> bool:
         """Delete item by ID."""
-        if item_id in self._index:
-            item = self._index.pop(item_id)
-            # Rebuild deque without the item
-            self._memory = deque(
-                [m for m in self._memory if m.id != item_id],
-                maxlen=self.max_size
-            )
-            return True
-        return False
+        if self._index.pop(item_id, None) is None:
+            return False
+        self._unindex_content(item_id)
+        self._token_counts.pop(item_id, None)
+        
+        # Leave the deque entry as a tombstone instead of rebuilding it
+        self._tombstones.add(item_id)
+        self._maybe_compact()
+        return True
     
     async def clear(self) -> bool:
         """Clear all memory."""
         self._memory.clear()
         self._index.clear()
+        self._tombstones.clear()
+        self._lowered.clear()
+        self._postings.clear()
+        self._token_counts.clear()
         return True
     
     async def get_recent(self, limit: int = 10) -> List[MemoryItem]:
         """Get recent items (most recent first)."""
-        items = list(self._memory)
-        items.reverse()
-        return items[:limit]
+        return list(islice(self._live(reversed(self._memory)), limit))
     
     async def count(self) -> int:
         """Get memory count."""
-        return len(self._memory)
+        return len(self._memory) - len(self._tombstones)
     
     async def get_all(self) -> List[MemoryItem]:
         """Get all items in chronological order."""
-        return list(self._memory)
+        return list(self._live(self._memory))
     
     def to_messages(self) -> List[Dict[str, str]]:
         """Convert memory to message format for LLM.
@@ -99,7 +182,7 @@ class ShortTermMemory(BaseMemory):
         """
         return [
             {"role": item.role, "content": item.content}
-            for item in self._memory
+            for item in self._live(self._memory)
         ]
     
     async def add_user_message(self, content: str) -> str:
@@ -112,23 +195,73 @@ class ShortTermMemory(BaseMemory):
         item = MemoryItem(content=content, role="assistant")
         return await self.add(item)
     
-    async def get_context_window(self, max_tokens: int = 4000) -> List[MemoryItem]:
-        """Get items that fit within token limit (approximate).
+    async def _count_item_tokens(self, encoding: tiktoken.Encoding) -> Dict[str, int]:
+        """Get exact token counts for live items, encoding new ones in one batch.
+        
+        The batch is encoded in a worker thread; items added meanwhile
+        have no count yet.
+        """
+        if encoding.name != self._token_model:
+            self._token_counts.clear()
+            self._token_model = encoding.name
+        
+        counts = self._token_counts
+        pending = [item for item in self._live(self._memory) if item.id not in counts]
+        if pending:
+            encoded = await asyncio.to_thread(
+                encoding.encode_ordinary_batch, [item.content for item in pending]
+            )
+            for item, tokens in zip(pending, encoded):
+                counts[item.id] = len(tokens)
+        return counts
+    
+    async def get_context_window(
+        self,
+        max_tokens: int = 4000,
+        use_tiktoken: bool = False,
+        model_name: Optional[str] = None
+    ) -> List[MemoryItem]:
+        """Get items that fit within token limit.
+        
+        Token counts are estimated from characters (~4 per token) unless
+        exact counting is requested for a model tiktoken knows.
         
         Args:
             max_tokens: Maximum tokens to include
-            
+            use_tiktoken: Count exact tokens with tiktoken
+            model_name: Model whose tokenizer to count with; the estimate
+                is used when tiktoken doesn't know it or can't load it
+        
         Returns:
             List of items within token budget
         """
         items = []
-        total_chars = 0
-        char_limit = max_tokens * 4  # Rough estimate
         
-        for item in reversed(list(self._memory)):
-            if total_chars + len(item.content) > char_limit:
-                break
-            items.insert(0, item)
-            total_chars += len(item.content)
+        encoding = None
+        if use_tiktoken and model_name:
+            try:
+                # The first load of an encoding may download its BPE file
+                encoding = await asyncio.to_thread(get_model_encoding, model_name)
+            except Exception:
+                encoding = None
         
+        if encoding is not None:
+            counts = await self._count_item_tokens(encoding)
+            total_tokens = 0
+            for item in self._live(reversed(self._memory)):
+                count = counts.get(item.id)
+                total_tokens += count if count is not None else len(item.content) // 4
+                if total_tokens > max_tokens:
+                    break
+                items.append(item)
+        else:
+            total_chars = 0
+            char_limit = max_tokens * 4  # Rough estimate
+            for item in self._live(reversed(self._memory)):
+                total_chars += len(item.content)
+                if total_chars > char_limit:
+                    break
+                items.append(item)
+        
+        items.reverse()
         return items
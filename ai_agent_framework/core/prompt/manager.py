@@ -1,21 +1,84 @@
 """Prompt Template Manager."""
 
-import json
 import os
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel
-from pathlib import Path
+import sys
+from dataclasses import dataclass, field, fields
+from string import Formatter
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Any, Tuple, Union
+import orjson
 
+from utils.cache import TTLCache
 
-class PromptTemplate(BaseModel):
-    """Prompt template model."""
+
+def compile_template(template: str) -> Callable[[Mapping[str, Any]], str]:
+    """Compile a str.format-style template into a render function.
+    
+    The template is parsed once; rendering only joins literals with the
+    looked-up values. Templates without placeholders render to a constant.
+    Templates using positional fields, attribute/index access, conversions
+    or format specs fall back to str.format.
+    
+    Args:
+        template: Template string with {name} placeholders
+        
+    Returns:
+        Function mapping variable values to the rendered string
+    """
+    parts: List[Tuple[str, Optional[str]]] = []
+    for literal, field_name, format_spec, conversion in Formatter().parse(template):
+        if field_name is not None and (
+            not field_name.isidentifier() or format_spec or conversion
+        ):
+            return lambda values: template.format(**values)
+        parts.append((literal, field_name))
+    
+    if all(field_name is None for _, field_name in parts):
+        # Static template (e.g. a fixed system prompt): nothing to substitute
+        static = template if "{" not in template and "}" not in template else (
+            "".join(literal for literal, _ in parts)
+        )
+        return lambda values: static
+    
+    def render(values: Mapping[str, Any]) -> str:
+        out = []
+        for literal, field_name in parts:
+            out.append(literal)
+            if field_name is not None:
+                out.append(format(values[field_name]))
+        return "".join(out)
+    
+    return render
+
+
+@dataclass(slots=True)
+class PromptTemplate:
+    """Prompt template model.
+    
+    A slotted dataclass rather than a pydantic model: templates are plain
+    data containers that are read on every route and render.
+    """
     name: str
     template: str
     description: str = ""
-    variables: List[str] = []
+    variables: List[str] = field(default_factory=list)
     category: str = "general"
     version: str = "1.0"
-    metadata: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    _compiled: Optional[Tuple[str, Callable[[Mapping[str, Any]], str]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PromptTemplate":
+        """Build a template from a JSON dict, ignoring unknown keys."""
+        return cls(**{k: v for k, v in data.items() if k in _TEMPLATE_FIELDS})
+    
+    def dict(self) -> Dict[str, Any]:
+        """Return the template as a dict (pydantic-compatible shim)."""
+        return {name: getattr(self, name) for name in _TEMPLATE_FIELDS}
+    
+    model_dump = dict
     
     def format(self, **kwargs) -> str:
         """Format the template with variables.
@@ -26,7 +89,11 @@ class PromptTemplate(BaseModel):
         Returns:
             Formatted prompt string
         """
-        return self.template.format(**kwargs)
+        # Recompile only if the template string was replaced
+        compiled = self._compiled
+        if compiled is None or compiled[0] is not self.template:
+            compiled = self._compiled = (self.template, compile_template(self.template))
+        return compiled[1](kwargs)
     
     def validate_variables(self, **kwargs) -> bool:
         """Validate that all required variables are provided.
@@ -42,12 +109,26 @@ class PromptTemplate(BaseModel):
         return required.issubset(provided)
 
 
+_TEMPLATE_FIELDS = tuple(f.name for f in fields(PromptTemplate) if f.init)
+
+
+def _parse_templates(raw: Union[bytes, str]) -> List[PromptTemplate]:
+    """Parse a JSON template file holding one template or a list of them."""
+    data = orjson.loads(raw)
+    if isinstance(data, list):
+        return [PromptTemplate.from_dict(item) for item in data]
+    return [PromptTemplate.from_dict(data)]
+
+
 class PromptManager:
     """Manages prompt templates with CRUD operations."""
     
     def __init__(self, templates_dir: Optional[str] = None):
         self.templates: Dict[str, PromptTemplate] = {}
         self.templates_dir = templates_dir
+        # Rendered prompts for repeated (name, variables) calls
+        self._format_cache = TTLCache(max_entries=256)
+        self._revision = 0
         
         # Load templates from directory if provided
         if templates_dir and os.path.exists(templates_dir):
@@ -58,20 +139,16 @@ class PromptManager:
     
     def _load_from_directory(self, directory: str):
         """Load templates from JSON files in directory."""
-        path = Path(directory)
-        for file_path in path.glob("*.json"):
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        for item in data:
-                            template = PromptTemplate(**item)
-                            self.templates[template.name] = template
-                    else:
-                        template = PromptTemplate(**data)
-                        self.templates[template.name] = template
-            except Exception as e:
-                print(f"Error loading template from {file_path}: {e}")
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                try:
+                    with open(entry.path, "rb") as f:
+                        templates = _parse_templates(f.read())
+                    self._store(templates)
+                except Exception as e:
+                    print(f"Error loading template from {entry.path}: {e}")
     
     def _register_defaults(self):
         """Register default prompt templates."""
@@ -153,9 +230,19 @@ QA Pairs:""",
             ),
         ]
         
-        for template in defaults:
-            if template.name not in self.templates:
-                self.templates[template.name] = template
+        self._store(t for t in defaults if t.name not in self.templates)
+    
+    @property
+    def revision(self) -> int:
+        """Counter bumped whenever templates are added, replaced or deleted."""
+        return self._revision
+    
+    def _store(self, templates: Iterable[PromptTemplate]):
+        """Store templates under interned names and invalidate caches."""
+        for template in templates:
+            self.templates[sys.intern(template.name)] = template
+        self._revision += 1
+        self._format_cache.clear()
     
     def register(self, template: PromptTemplate) -> bool:
         """Register a new template.
@@ -166,7 +253,7 @@ QA Pairs:""",
         Returns:
             True if successful
         """
-        self.templates[template.name] = template
+        self._store((template,))
         return True
     
     def get(self, name: str) -> Optional[PromptTemplate]:
@@ -191,6 +278,8 @@ QA Pairs:""",
         """
         if name in self.templates:
             del self.templates[name]
+            self._revision += 1
+            self._format_cache.clear()
             return True
         return False
     
@@ -229,10 +318,23 @@ QA Pairs:""",
         Raises:
             ValueError: If template not found
         """
+        try:
+            cache_key = (name, tuple(sorted(kwargs.items())))
+            cached = self._format_cache.get(cache_key)
+        except TypeError:
+            # Unhashable variable values are rendered without caching
+            cache_key = cached = None
+        if cached is not None:
+            return cached
+        
         template = self.get(name)
         if not template:
             raise ValueError(f"Template not found: {name}")
-        return template.format(**kwargs)
+        
+        prompt = template.format(**kwargs)
+        if cache_key is not None:
+            self._format_cache.set(cache_key, prompt)
+        return prompt
     
     def save_to_file(self, filepath: str):
         """Save all templates to a JSON file.
@@ -240,9 +342,12 @@ QA Pairs:""",
         Args:
             filepath: Output file path
         """
-        data = [t.model_dump() for t in self.templates.values()]
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        data = orjson.dumps(
+            [t.model_dump() for t in self.templates.values()],
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        )
+        with open(filepath, "wb") as f:
+            f.write(data)
     
     def load_from_file(self, filepath: str):
         """Load templates from a JSON file.
@@ -250,12 +355,5 @@ QA Pairs:""",
         Args:
             filepath: Input file path
         """
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                for item in data:
-                    template = PromptTemplate(**item)
-                    self.templates[template.name] = template
-            else:
-                template = PromptTemplate(**data)
-                self.templates[template.name] = template
+        with open(filepath, "rb") as f:
+            self._store(_parse_templates(f.read()))
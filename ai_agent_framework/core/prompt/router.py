@@ -1,13 +1,20 @@
 """Prompt Router - Dynamic prompt selection based on intent."""
 
+from collections import defaultdict
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Callable, Any
-from pydantic import BaseModel
+from typing import Dict, FrozenSet, Iterator, List, Optional, Callable, Any, Pattern, Set, Tuple
 import re
+import sys
 
 from core.prompt.manager import PromptManager, PromptTemplate
 from core.llm.base import BaseLLM, Message
 
+try:
+    import ahocorasick
+except ImportError:  # Optional: keyword rules fall back to substring checks
+    ahocorasick = None
+
 
 class RouterStrategy(str, Enum):
     """Routing strategy types."""
@@ -18,20 +25,36 @@ class RouterStrategy(str, Enum):
     CUSTOM = "custom"        # Custom function
 
 
-class RouteRule(BaseModel):
+@dataclass(slots=True)
+class RouteRule:
     """Route rule definition."""
     name: str
     template_name: str
     strategy: RouterStrategy
     pattern: Optional[str] = None  # For keyword/regex
-    keywords: List[str] = []       # For keyword strategy
+    keywords: List[str] = field(default_factory=list)  # For keyword strategy
     priority: int = 0              # Higher = more priority
     description: str = ""
+    
+    # Matchers precomputed by PromptRouter.add_rule
+    _keywords_folded: Tuple[str, ...] = field(default=(), init=False, repr=False, compare=False)
+    _regex: Optional[Pattern[str]] = field(default=None, init=False, repr=False, compare=False)
+    # Resolved template, valid while the manager revision is unchanged
+    _template: Optional[PromptTemplate] = field(default=None, init=False, repr=False, compare=False)
+    _template_revision: int = field(default=-1, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Accept plain strings such as "keyword", as the pydantic model did
+        self.strategy = RouterStrategy(self.strategy)
+        self.template_name = sys.intern(self.template_name)
 
 
 class PromptRouter:
     """Routes user input to appropriate prompt templates."""
     
+    # Keyword rule count from which one Aho-Corasick pass beats per-rule scans
+    AUTOMATON_MIN_RULES = 8
+    
     def __init__(
         self,
         prompt_manager: PromptManager,
@@ -42,7 +65,16 @@ class PromptRouter:
         self.default_template = default_template
         self.llm = llm
         self.rules: List[RouteRule] = []
+        # Rules grouped by strategy, each group in priority order
+        self._rules_by_strategy: Dict[RouterStrategy, List[RouteRule]] = {}
         self.custom_handlers: Dict[str, Callable] = {}
+        # Flat (folded keyword, keyword rule index) pairs in priority order
+        self._keyword_table: List[Tuple[str, int]] = []
+        # Keyword -> owning rule indices, when pyahocorasick is installed
+        self._keyword_automaton = None
+        self._empty_keyword_rules: FrozenSet[int] = frozenset()
+        # (manager revision, classifier system message) for _match_llm
+        self._classifier_prompt: Optional[Tuple[int, Message]] = None
         
         # Register default routes
         self._register_defaults()
@@ -93,9 +125,17 @@ class PromptRouter:
         Args:
             rule: RouteRule to add
         """
+        rule._keywords_folded = tuple(kw.casefold() for kw in rule.keywords)
+        # Only REGEX rules use the pattern as a regex
+        rule._regex = (
+            re.compile(rule.pattern, re.IGNORECASE)
+            if rule.strategy == RouterStrategy.REGEX and rule.pattern
+            else None
+        )
         self.rules.append(rule)
         # Sort by priority (descending)
         self.rules.sort(key=lambda r: r.priority, reverse=True)
+        self._reindex_rules()
     
     def remove_rule(self, name: str) -> bool:
         """Remove a routing rule by name.
@@ -108,6 +148,7 @@ class PromptRouter:
         """
         original_len = len(self.rules)
         self.rules = [r for r in self.rules if r.name != name]
+        self._reindex_rules()
         return len(self.rules) < original_len
     
     def register_custom_handler(
@@ -123,19 +164,76 @@ class PromptRouter:
         """
         self.custom_handlers[name] = handler
     
-    def _match_keyword(self, text: str, keywords: List[str]) -> bool:
-        """Match text against keywords."""
-        text_lower = text.lower()
-        return any(kw.lower() in text_lower for kw in keywords)
+    def _reindex_rules(self):
+        """Regroup rules by strategy and rebuild the keyword matchers."""
+        grouped: Dict[RouterStrategy, List[RouteRule]] = defaultdict(list)
+        for rule in self.rules:
+            grouped[rule.strategy].append(rule)
+        self._rules_by_strategy = dict(grouped)
+        
+        keyword_rules = grouped.get(RouterStrategy.KEYWORD, [])
+        self._keyword_table = [
+            (kw, index)
+            for index, rule in enumerate(keyword_rules)
+            for kw in rule._keywords_folded
+        ]
+        self._rebuild_keyword_automaton(len(keyword_rules))
     
-    def _match_regex(self, text: str, pattern: str) -> bool:
-        """Match text against regex pattern."""
-        return bool(re.search(pattern, text, re.IGNORECASE))
+    def _rebuild_keyword_automaton(self, rule_count: int):
+        """Build one automaton over the keyword table."""
+        self._keyword_automaton = None
+        if ahocorasick is None or rule_count < self.AUTOMATON_MIN_RULES:
+            return
+        
+        owners: Dict[str, Set[int]] = defaultdict(set)
+        for kw, index in self._keyword_table:
+            owners[kw].add(index)
+        
+        # An empty keyword matches any input, as with the substring check
+        self._empty_keyword_rules = frozenset(owners.pop("", ()))
+        
+        automaton = ahocorasick.Automaton()
+        for kw, indices in owners.items():
+            automaton.add_word(kw, frozenset(indices))
+        automaton.make_automaton()
+        self._keyword_automaton = automaton
     
-    async def _match_llm(self, text: str) -> Optional[str]:
-        """Use LLM to classify intent and select template."""
-        if not self.llm:
-            return None
+    def _match_keyword_rules(self, text_folded: str) -> Iterator[RouteRule]:
+        """Yield keyword rules matching case-folded text, in priority order."""
+        keyword_rules = self._rules_by_strategy.get(RouterStrategy.KEYWORD, [])
+        
+        if self._keyword_automaton is not None:
+            # Single pass over the input collects every matching rule
+            matched = set(self._empty_keyword_rules)
+            for _, indices in self._keyword_automaton.iter(text_folded):
+                matched.update(indices)
+            for index in sorted(matched):
+                yield keyword_rules[index]
+            return
+        
+        last = -1
+        for kw, index in self._keyword_table:
+            if index != last and kw in text_folded:
+                last = index
+                yield keyword_rules[index]
+    
+    def _resolve_template(self, rule: RouteRule) -> Optional[PromptTemplate]:
+        """Get a rule's template, looked up again only after templates change."""
+        revision = self.prompt_manager.revision
+        if rule._template_revision != revision:
+            rule._template = self.prompt_manager.get(rule.template_name)
+            rule._template_revision = revision
+        return rule._template
+    
+    def _match_regex(self, text: str, regex: Pattern[str]) -> bool:
+        """Match text against a compiled regex pattern."""
+        return bool(regex.search(text))
+    
+    def _get_classifier_prompt(self) -> Message:
+        """Get the classifier system message, rebuilt only after templates change."""
+        revision = self.prompt_manager.revision
+        if self._classifier_prompt is not None and self._classifier_prompt[0] == revision:
+            return self._classifier_prompt[1]
         
         # Build classification prompt
         template_options = "\n".join([
@@ -143,16 +241,25 @@ class PromptRouter:
             for t in self.prompt_manager.list_templates()
         ])
         
-        messages = [
-            Message(
-                role="system",
-                content=f"""You are an intent classifier. Based on the user's input, 
+        message = Message(
+            role="system",
+            content=f"""You are an intent classifier. Based on the user's input, 
 select the most appropriate template from the following options:
 
 {template_options}
 
 Respond with ONLY the template name, nothing else."""
-            ),
+        )
+        self._classifier_prompt = (revision, message)
+        return message
+    
+    async def _match_llm(self, text: str) -> Optional[str]:
+        """Use LLM to classify intent and select template."""
+        if not self.llm:
+            return None
+        
+        messages = [
+            self._get_classifier_prompt(),
             Message(role="user", content=text)
         ]
         
@@ -179,35 +286,35 @@ Respond with ONLY the template name, nothing else."""
             Selected PromptTemplate
         """
         context = context or {}
+        rules = self._rules_by_strategy
         
-        # Try each rule in priority order
-        for rule in self.rules:
-            matched = False
-            
-            if rule.strategy == RouterStrategy.KEYWORD:
-                matched = self._match_keyword(user_input, rule.keywords)
-            
-            elif rule.strategy == RouterStrategy.REGEX:
-                if rule.pattern:
-                    matched = self._match_regex(user_input, rule.pattern)
-            
-            elif rule.strategy == RouterStrategy.CUSTOM:
-                if rule.name in self.custom_handlers:
-                    result = self.custom_handlers[rule.name](user_input)
-                    if result:
-                        template = self.prompt_manager.get(result)
-                        if template:
-                            return template
-            
-            elif rule.strategy == RouterStrategy.LLM:
-                template_name = await self._match_llm(user_input)
-                if template_name:
-                    template = self.prompt_manager.get(template_name)
+        # Cheap strategies first, so a match never waits on an LLM call
+        # Fold case once; keywords were folded when their rule was added
+        text_folded = user_input.casefold()
+        for rule in self._match_keyword_rules(text_folded):
+            template = self._resolve_template(rule)
+            if template:
+                return template
+        
+        for rule in rules.get(RouterStrategy.REGEX, ()):
+            if rule._regex is not None and self._match_regex(user_input, rule._regex):
+                template = self._resolve_template(rule)
+                if template:
+                    return template
+        
+        for rule in rules.get(RouterStrategy.CUSTOM, ()):
+            if rule.name in self.custom_handlers:
+                result = self.custom_handlers[rule.name](user_input)
+                if result:
+                    template = self.prompt_manager.get(result)
                     if template:
                         return template
-            
-            if matched:
-                template = self.prompt_manager.get(rule.template_name)
+        
+        # One classifier call covers every LLM rule
+        if rules.get(RouterStrategy.LLM):
+            template_name = await self._match_llm(user_input)
+            if template_name:
+                template = self.prompt_manager.get(template_name)
                 if template:
                     return template
         
@@ -1,13 +1,19 @@
 """RAG module - Retrieval Augmented Generation."""
 
 from core.rag.embeddings import EmbeddingModel
+from core.rag.embedding_cache import EmbeddingCache
 from core.rag.retriever import Retriever
+from core.rag.semantic_cache import SemanticCache
+from core.rag.search_batcher import SearchBatcher
 from core.rag.chain import RAGChain
 from core.rag.langchain_chain import LangChainRAGChain, LangChainConversationChain
 
 __all__ = [
     "EmbeddingModel",
+    "EmbeddingCache",
     "Retriever",
+    "SemanticCache",
+    "SearchBatcher",
     "RAGChain",
     "LangChainRAGChain",
     "LangChainConversationChain",
@@ -1,7 +1,9 @@
 """RAG Chain - Combines retrieval and generation."""
 
-from typing import List, Optional, Dict, Any, AsyncGenerator
+import asyncio
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 from core.llm.base import BaseLLM, Message
+from core.prompt.manager import compile_template
 from core.rag.retriever import Retriever
 from core.vector_store.base import SearchResult
 
@@ -18,6 +20,9 @@ Context:
 Question: {question}
 
 Answer:"""
+    
+    # Context size (chars) above which prompt assembly moves off the event loop
+    THREAD_ASSEMBLY_THRESHOLD = 64000
 
     def __init__(
         self,
@@ -31,27 +36,28 @@ Answer:"""
         self.llm = llm
         self.retriever = retriever
         self.template = template or self.DEFAULT_TEMPLATE
+        self._render_template = compile_template(self.template)
         self.system_message = system_message or "You are a helpful assistant that answers questions based on the provided context."
+        # Messages are immutable, so one system message serves every query
+        self._system_msg = Message(role="system", content=self.system_message)
         self.include_sources = include_sources
         self.max_context_length = max_context_length
     
     def _format_context(self, results: List[SearchResult]) -> str:
         """Format retrieved results into context string."""
         context_parts = []
-        total_length = 0
+        remaining = self.max_context_length
         
-        for i, result in enumerate(results):
+        for i, result in enumerate(results, 1):
             content = result.content
-            # Truncate if needed
-            if total_length + len(content) > self.max_context_length:
-                remaining = self.max_context_length - total_length
-                if remaining > 100:  # Only add if we can fit meaningful content
-                    content = content[:remaining] + "..."
-                else:
-                    break
+            if len(content) > remaining:
+                # Truncate the last result only if meaningful content fits
+                if remaining > 100:
+                    context_parts.append(f"[{i}] {content[:remaining]}...")
+                break
             
-            context_parts.append(f"[{i+1}] {content}")
-            total_length += len(content)
+            context_parts.append(f"[{i}] {content}")
+            remaining -= len(content)
         
         return "\n\n".join(context_parts)
     
@@ -61,10 +67,43 @@ Answer:"""
         context: str
     ) -> str:
         """Build the prompt from template."""
-        return self.template.format(
-            context=context,
-            question=question
-        )
+        return self._render_template({"context": context, "question": question})
+    
+    def _assemble_prompt(self, question: str, results: List[SearchResult]) -> str:
+        """Format retrieved context and build the user prompt."""
+        return self._build_prompt(question, self._format_context(results))
+    
+    async def _retrieve_prompt(
+        self,
+        question: str,
+        top_k: Optional[int],
+        filters: Optional[Dict[str, Any]],
+        chat_history: Optional[List[Message]]
+    ) -> Tuple[List[Message], List[SearchResult]]:
+        """Retrieve documents and build the message list.
+        
+        Returns:
+            Tuple of (messages, search results)
+        """
+        # Start retrieval, then build the history part while it runs
+        retrieval = asyncio.create_task(self.retriever.retrieve(
+            query=question,
+            top_k=top_k,
+            filters=filters
+        ))
+        
+        messages = [self._system_msg, *(chat_history or ())]
+        
+        results = await retrieval
+        
+        # Large contexts are assembled in a worker thread to keep the loop free
+        if self.max_context_length > self.THREAD_ASSEMBLY_THRESHOLD:
+            prompt = await asyncio.to_thread(self._assemble_prompt, question, results)
+        else:
+            prompt = self._assemble_prompt(question, results)
+        
+        messages.append(Message(role="user", content=prompt))
+        return messages, results
     
     async def query(
         self,
@@ -86,27 +125,11 @@ Answer:"""
         Returns:
             Dict with answer, sources, etc.
         """
-        # Retrieve relevant documents
-        results = await self.retriever.retrieve(
-            query=question,
-            top_k=top_k,
-            filters=filters
+        # Retrieve relevant documents and build messages
+        messages, results = await self._retrieve_prompt(
+            question, top_k, filters, chat_history
         )
         
-        # Format context
-        context = self._format_context(results)
-        
-        # Build messages
-        messages = [Message(role="system", content=self.system_message)]
-        
-        # Add chat history if provided
-        if chat_history:
-            messages.extend(chat_history)
-        
-        # Add current question with context
-        prompt = self._build_prompt(question, context)
-        messages.append(Message(role="user", content=prompt))
-        
         # Generate response
         response = await self.llm.generate(messages, **kwargs)
         
@@ -137,9 +160,13 @@ Answer:"""
         filters: Optional[Dict[str, Any]] = None,
         chat_history: Optional[List[Message]] = None,
         **kwargs
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncIterator[str]:
         """Stream query the RAG chain.
         
+        Retrieval runs when this coroutine is awaited; the returned
+        iterator is the LLM stream itself, so chunks are not re-yielded
+        through an extra generator frame.
+        
         Args:
             question: User question
             top_k: Number of documents to retrieve
@@ -147,31 +174,15 @@ Answer:"""
             chat_history: Previous conversation history
             **kwargs: Additional LLM parameters
             
-        Yields:
-            Response chunks
+        Returns:
+            Async iterator of response chunks
         """
-        # Retrieve relevant documents
-        results = await self.retriever.retrieve(
-            query=question,
-            top_k=top_k,
-            filters=filters
+        # Retrieve relevant documents and build messages
+        messages, _ = await self._retrieve_prompt(
+            question, top_k, filters, chat_history
         )
         
-        # Format context
-        context = self._format_context(results)
-        
-        # Build messages
-        messages = [Message(role="system", content=self.system_message)]
-        
-        if chat_history:
-            messages.extend(chat_history)
-        
-        prompt = self._build_prompt(question, context)
-        messages.append(Message(role="user", content=prompt))
-        
-        # Stream generate
-        async for chunk in self.llm.stream_generate(messages, **kwargs):
-            yield chunk
+        return self.llm.stream_generate(messages, **kwargs)
     
     async def add_documents(
         self,
@@ -0,0 +1,82 @@
+"""Content-addressed cache for text embeddings."""
+
+import hashlib
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from utils.cache import TTLCache
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of embeddings keyed by SHA-256 of the text.
+    
+    Hashing keeps keys at 32 bytes regardless of document length, and
+    vectors are held as float32 arrays rather than lists of Python floats.
+    A cache belongs to one embedding model; vectors from different models
+    must not share a cache.
+    """
+    
+    def __init__(self, max_size: int = 4096, ttl: Optional[float] = None):
+        """Initialize cache.
+        
+        Args:
+            max_size: Maximum number of cached embeddings
+            ttl: Seconds an embedding stays valid, or None to never expire
+        """
+        self._cache = TTLCache(max_entries=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+    
+    def get(self, text: str) -> Optional[List[float]]:
+        """Get a cached embedding.
+        
+        Args:
+            text: Embedded text
+        
+        Returns:
+            New list with the embedding, or None on a miss
+        """
+        key = self._key(text)
+        with self._lock:
+            vector = self._cache.get(key)
+        return vector.tolist() if vector is not None else None
+    
+    def get_array(self, text: str) -> Optional[np.ndarray]:
+        """Get a cached embedding as the stored float32 array.
+        
+        The array is shared with the cache and must not be modified.
+        
+        Args:
+            text: Embedded text
+        
+        Returns:
+            Embedding array, or None on a miss
+        """
+        key = self._key(text)
+        with self._lock:
+            return self._cache.get(key)
+    
+    def put(self, text: str, vector: Sequence[float]):
+        """Cache the embedding of a text.
+        
+        Args:
+            text: Embedded text
+            vector: Embedding vector
+        """
+        key = self._key(text)
+        vector = np.array(vector, dtype=np.float32)
+        with self._lock:
+            self._cache.set(key, vector)
+    
+    def clear(self):
+        """Remove all cached embeddings."""
+        with self._lock:
+            self._cache.clear()
+    
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -1,10 +1,32 @@
 """Embedding model for RAG."""
 
-from typing import List, Optional
+import asyncio
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
 from app.config import get_settings
+from core.rag.embedding_cache import EmbeddingCache
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize embeddings to int8 with a symmetric per-vector scale.
+    
+    Cuts in-memory vector matrices to a quarter of their float32 size;
+    `EmbeddingModel.batch_similarity` scores the codes directly.
+    
+    Args:
+        embeddings: Float array of shape (n, dimension)
+        
+    Returns:
+        Tuple of int8 codes (n, dimension) and float32 scales (n,)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(embeddings / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
 
 
 class EmbeddingModel:
@@ -14,42 +36,82 @@ class EmbeddingModel:
         self,
         model_name: Optional[str] = None,
         device: Optional[str] = None,
-        normalize: bool = True
+        normalize: bool = True,
+        max_batch_size: int = 32,
+        batch_wait_ms: float = 5.0,
+        cache_size: Optional[int] = None,
+        cache_ttl: Optional[float] = None
     ):
         settings = get_settings()
         self.model_name = model_name or settings.embedding_model
         self.device = device or settings.embedding_device
         self.normalize = normalize
-        
-        self.model = SentenceTransformer(
-            self.model_name,
-            device=self.device
+        self.max_batch_size = max_batch_size
+        self.batch_wait_ms = batch_wait_ms
+        # Queries waiting to be encoded together by aembed_query
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Repeated texts (follow-up queries, re-ingested chunks) skip the forward pass
+        self.embedding_cache = EmbeddingCache(
+            max_size=settings.embedding_cache_size if cache_size is None else cache_size,
+            ttl=settings.embedding_cache_ttl if cache_ttl is None else cache_ttl
         )
+        
+        # Weights are loaded on first use; encodes may run on worker threads
+        self._model: Optional[SentenceTransformer] = None
+        self._model_lock = threading.Lock()
         self._dimension = None
     
+    @property
+    def model(self) -> SentenceTransformer:
+        """Get the SentenceTransformer, loading it on first access."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(
+                        self.model_name,
+                        device=self.device
+                    )
+        return self._model
+    
     @property
     def dimension(self) -> int:
         """Get embedding dimension."""
         if self._dimension is None:
-            test_embedding = self.model.encode(["test"])
-            self._dimension = len(test_embedding[0])
+            dimension = self.model.get_sentence_embedding_dimension()
+            if dimension is None:
+                # Some models do not declare it; fall back to a probe encode
+                dimension = len(self.model.encode(["test"])[0])
+            self._dimension = dimension
         return self._dimension
     
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        """Embed texts to vectors.
+    def embed_np(self, texts: List[str]) -> np.ndarray:
+        """Embed texts to a float32 array.
         
         Args:
             texts: List of texts to embed
             
         Returns:
-            List of embedding vectors
+            Array of shape (len(texts), dimension)
         """
-        embeddings = self.model.encode(
+        return self.model.encode(
             texts,
             normalize_embeddings=self.normalize,
-            show_progress_bar=False
+            show_progress_bar=False,
+            convert_to_numpy=True
         )
-        return embeddings.tolist()
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts to vectors.
+        
+        Args:
+            texts: List of texts to embed
+            
+        Returns:
+            List of embedding vectors
+        """
+        return self.embed_np(texts).tolist()
     
     def embed_query(self, query: str) -> List[float]:
         """Embed a single query.
@@ -60,7 +122,109 @@ class EmbeddingModel:
         Returns:
             Embedding vector
         """
-        return self.embed([query])[0]
+        cached = self.embedding_cache.get(query)
+        if cached is not None:
+            return cached
+        
+        vector = self.embed_np([query])[0]
+        self.embedding_cache.put(query, vector)
+        return vector.tolist()
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a single query without blocking the event loop.
+        
+        Concurrent calls arriving within `batch_wait_ms` of each other are
+        encoded together in one model batch on a worker thread. Cached
+        queries return immediately and identical in-flight queries share
+        one encode.
+        
+        Args:
+            query: Query text
+            
+        Returns:
+            Embedding vector
+        """
+        cached = self.embedding_cache.get(query)
+        if cached is not None:
+            return cached
+        
+        future = self._inflight.get(query)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._inflight[query] = loop.create_future()
+            self._pending.append((query, future))
+            
+            if len(self._pending) >= self.max_batch_size:
+                self._flush_pending()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_wait_ms / 1000, self._flush_pending)
+        
+        # Shielded so one cancelled caller doesn't fail the others
+        return list(await asyncio.shield(future))
+    
+    def _flush_pending(self):
+        """Encode all pending queries as one batch and resolve their futures."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        encoded = asyncio.get_running_loop().run_in_executor(
+            None, self.embed, [query for query, _ in batch]
+        )
+        
+        def _resolve(done: asyncio.Future):
+            error = done.exception()
+            vectors = done.result() if error is None else [None] * len(batch)
+            for (query, future), vector in zip(batch, vectors):
+                self._inflight.pop(query, None)
+                if error is None:
+                    self.embedding_cache.put(query, vector)
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(vector)
+        
+        encoded.add_done_callback(_resolve)
+    
+    def embed_documents_np(self, documents: List[str]) -> np.ndarray:
+        """Embed multiple documents to a float32 array.
+        
+        Only texts missing from the embedding cache are encoded; each
+        distinct text is encoded once per call.
+        
+        Args:
+            documents: List of document texts
+            
+        Returns:
+            Array of shape (len(documents), dimension)
+        """
+        if not documents:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        
+        embeddings: List[Optional[np.ndarray]] = [
+            self.embedding_cache.get_array(text) for text in documents
+        ]
+        
+        # Distinct uncached texts, mapped to their positions in the input
+        misses: Dict[str, List[int]] = {}
+        for i, vector in enumerate(embeddings):
+            if vector is None:
+                misses.setdefault(documents[i], []).append(i)
+        
+        if misses:
+            encoded = self.embed_np(list(misses))
+            for (text, positions), vector in zip(misses.items(), encoded):
+                self.embedding_cache.put(text, vector)
+                for i in positions:
+                    embeddings[i] = vector
+        
+        return np.stack(embeddings).astype(np.float32, copy=False)
     
     def embed_documents(self, documents: List[str]) -> List[List[float]]:
         """Embed multiple documents.
@@ -71,9 +235,13 @@ class EmbeddingModel:
         Returns:
             List of embedding vectors
         """
-        return self.embed(documents)
+        return self.embed_documents_np(documents).tolist()
     
-    def similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    def similarity(
+        self,
+        vec1: Union[np.ndarray, Sequence[float]],
+        vec2: Union[np.ndarray, Sequence[float]]
+    ) -> float:
         """Calculate cosine similarity between two vectors.
         
         Args:
@@ -83,6 +251,38 @@ class EmbeddingModel:
         Returns:
             Cosine similarity score
         """
-        vec1 = np.array(vec1)
-        vec2 = np.array(vec2)
+        vec1 = np.asarray(vec1)
+        vec2 = np.asarray(vec2)
+        if self.normalize:
+            # Our embeddings are unit length, so cosine is the dot product
+            return float(vec1 @ vec2)
         return float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
+    
+    def batch_similarity(
+        self,
+        query: Union[np.ndarray, Sequence[float]],
+        docs: Union[np.ndarray, Sequence[Sequence[float]]],
+        scales: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Calculate cosine similarity of one query against many vectors.
+        
+        Args:
+            query: Query vector of shape (dimension,)
+            docs: Matrix of shape (n, dimension), float or int8 codes
+            scales: Per-row scales when docs come from `quantize_int8`
+            
+        Returns:
+            Array of n similarity scores
+        """
+        query = np.asarray(query, dtype=np.float32)
+        docs = np.asarray(docs)
+        scores = docs @ query
+        if scales is not None:
+            # Scale the n scores rather than dequantizing the whole matrix
+            scores *= scales
+        if not self.normalize:
+            norms = np.linalg.norm(docs, axis=1)
+            if scales is not None:
+                norms *= scales
+            scores /= norms * np.linalg.norm(query)
+        return scores
@@ -1,15 +1,108 @@
 """LangChain 1.x LCEL-based RAG Chain implementation."""
 
-from typing import List, Optional, Dict, Any, AsyncIterator
+import asyncio
+import threading
+from typing import Awaitable, List, Optional, Dict, Any, AsyncIterator, Tuple, Type, TypeVar
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough, RunnableParallel
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnablePassthrough, RunnableParallel, RunnableLambda
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
 
+from core.prompt.manager import compile_template
 from core.rag.retriever import Retriever
 from core.vector_store.base import SearchResult
 from app.config import get_settings
+from utils.cache import TTLCache
+
+
+T = TypeVar("T")
+
+# Event loop shared by sync callers, kept alive so HTTP connection pools
+# bound to it stay warm between calls
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Get the background event loop, starting its thread on first use."""
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name="langchain-chain-loop",
+                    daemon=True
+                ).start()
+                _background_loop = loop
+    return _background_loop
+
+
+def _run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+
+# Message class per chat-history role; roles not listed are skipped
+_ROLE_MAP: Dict[str, Type[BaseMessage]] = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+    "system": SystemMessage,
+}
+
+# Conversations bring their own system prompt, so history system turns are dropped
+_CONVERSATION_ROLE_MAP: Dict[str, Type[BaseMessage]] = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+}
+
+
+# Converted history messages by (class, content). Clients resend the whole
+# history every turn, so all but the newest turns are found here
+_history_messages = TTLCache(max_entries=4096)
+_history_messages_lock = threading.Lock()
+
+
+def _format_chat_history(
+    history: Optional[List[Dict[str, str]]],
+    role_map: Dict[str, Type[BaseMessage]] = _ROLE_MAP
+) -> List[BaseMessage]:
+    """Convert chat history dicts to LangChain messages.
+    
+    Message objects are reused across calls for identical turns; they are
+    only read by the chat models and must not be modified.
+    
+    Args:
+        history: Messages with 'role' and 'content' keys
+        role_map: Message class per role
+        
+    Returns:
+        LangChain messages, in order
+    """
+    if not history:
+        return []
+    
+    messages = []
+    with _history_messages_lock:
+        for msg in history:
+            message_cls = role_map.get(msg.get("role", "user"))
+            if message_cls is None:
+                continue
+            
+            content = msg.get("content", "")
+            if not isinstance(content, str):
+                messages.append(message_cls(content=content))
+                continue
+            
+            key = (message_cls, content)
+            message = _history_messages.get(key)
+            if message is None:
+                message = message_cls(content=content)
+                _history_messages.set(key, message)
+            messages.append(message)
+    return messages
 
 
 class LangChainRAGChain:
@@ -33,6 +126,10 @@ Question: {question}
 
 Please provide a comprehensive answer based on the context above."""
 
+    # Histories at least this long are converted on a worker thread while
+    # retrieval runs; shorter ones are cheaper to convert inline
+    THREAD_HISTORY_THRESHOLD = 20
+
     def __init__(
         self,
         retriever: Retriever,
@@ -43,7 +140,8 @@ Please provide a comprehensive answer based on the context above."""
         api_base: Optional[str] = None,
         system_prompt: Optional[str] = None,
         include_sources: bool = True,
-        max_context_length: int = 4000
+        max_context_length: int = 4000,
+        use_lcel: bool = False
     ):
         """Initialize LangChain RAG Chain.
         
@@ -57,12 +155,15 @@ Please provide a comprehensive answer based on the context above."""
             system_prompt: Custom system prompt
             include_sources: Whether to include sources in response
             max_context_length: Maximum context length in characters
+            use_lcel: Run calls through the LCEL chain (e.g. for tracing
+                callbacks) instead of calling the chat model directly
         """
         settings = get_settings()
         
         self.retriever = retriever
         self.include_sources = include_sources
         self.max_context_length = max_context_length
+        self.use_lcel = use_lcel
         
         # Initialize LangChain ChatOpenAI (1.x API)
         self.llm = ChatOpenAI(
@@ -73,59 +174,116 @@ Please provide a comprehensive answer based on the context above."""
             base_url=api_base or settings.openai_api_base,
         )
         
-        # Build prompt template using LCEL
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt or self.DEFAULT_SYSTEM_PROMPT),
-            MessagesPlaceholder(variable_name="chat_history", optional=True),
-            ("human", self.DEFAULT_USER_TEMPLATE),
-        ])
+        # Constant prompt parts are built once; per call only the user
+        # message is rendered and the history spliced in
+        self._system_msg = SystemMessage(content=system_prompt or self.DEFAULT_SYSTEM_PROMPT)
+        self._render_user = compile_template(self.DEFAULT_USER_TEMPLATE)
+        self.prompt = RunnableLambda(self._build_messages)
         
         # Build LCEL chain
         self.chain = self.prompt | self.llm | StrOutputParser()
     
+    @staticmethod
+    def _source_tag(index: int, metadata: Optional[Dict[str, Any]]) -> str:
+        """Build the "[Source N: name]" header for a context passage."""
+        if metadata:
+            source_name = metadata["source"] if "source" in metadata else metadata.get("file")
+            if source_name:
+                return f"[Source {index}: {source_name}]"
+        return f"[Source {index}]"
+    
     def _format_context(self, results: List[SearchResult]) -> str:
         """Format retrieved results into context string."""
+        return self._format_context_and_sources(results)[0]
+    
+    def _format_context_and_sources(
+        self,
+        results: List[SearchResult],
+        with_sources: bool = False
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Format the context string and the source previews in one pass.
+        
+        Args:
+            results: Search results in rank order
+            with_sources: Also build a preview dict for every result
+            
+        Returns:
+            Tuple of (context string, source previews)
+        """
         context_parts = []
-        total_length = 0
+        sources = []
+        # Remaining character budget, None once the context is full
+        remaining: Optional[int] = self.max_context_length
         
-        for i, result in enumerate(results):
+        for i, result in enumerate(results, 1):
             content = result.content
-            if total_length + len(content) > self.max_context_length:
-                remaining = self.max_context_length - total_length
-                if remaining > 100:
-                    content = content[:remaining] + "..."
+            if remaining is not None:
+                if len(content) > remaining:
+                    # Truncate the last result only if meaningful content fits
+                    if remaining > 100:
+                        context_parts.append(
+                            f"{self._source_tag(i, result.metadata)}\n{content[:remaining]}..."
+                        )
+                    remaining = None
                 else:
-                    break
-            
-            source_info = f"[Source {i+1}]"
-            if result.metadata:
-                source_name = result.metadata.get("source", result.metadata.get("file", ""))
-                if source_name:
-                    source_info = f"[Source {i+1}: {source_name}]"
+                    context_parts.append(f"{self._source_tag(i, result.metadata)}\n{content}")
+                    remaining -= len(content)
             
-            context_parts.append(f"{source_info}\n{content}")
-            total_length += len(content)
+            if with_sources:
+                sources.append({
+                    "id": result.id,
+                    "content": content[:200] + "..." if len(content) > 200 else content,
+                    "score": result.score,
+                    "metadata": result.metadata
+                })
+            elif remaining is None:
+                break
         
-        return "\n\n".join(context_parts)
+        return "\n\n".join(context_parts), sources
+    
+    def _build_messages(self, inputs: Dict[str, Any]) -> List[BaseMessage]:
+        """Build the chat messages from context, question and history."""
+        return [
+            self._system_msg,
+            *(inputs.get("chat_history") or ()),
+            HumanMessage(content=self._render_user(inputs)),
+        ]
     
-    def _format_chat_history(self, history: Optional[List[Dict[str, str]]]) -> List:
-        """Convert chat history to LangChain message format."""
-        if not history:
-            return []
+    async def _prepare_inputs(
+        self,
+        question: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        chat_history: Optional[List[Dict[str, str]]],
+        with_sources: bool = False
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Retrieve documents and build the chain inputs.
         
-        messages = []
-        for msg in history:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "user":
-                messages.append(HumanMessage(content=content))
-            elif role == "assistant":
-                messages.append(AIMessage(content=content))
-            elif role == "system":
-                messages.append(SystemMessage(content=content))
+        Returns:
+            Tuple of (chain inputs, source previews if with_sources)
+        """
+        retrieval = self.retriever.retrieve(
+            query=question,
+            top_k=top_k,
+            filters=filters
+        )
         
-        return messages
+        if chat_history and len(chat_history) >= self.THREAD_HISTORY_THRESHOLD:
+            results, history_messages = await asyncio.gather(
+                retrieval,
+                asyncio.to_thread(_format_chat_history, chat_history)
+            )
+        else:
+            results = await retrieval
+            history_messages = _format_chat_history(chat_history)
+        
+        context, sources = self._format_context_and_sources(results, with_sources)
+        inputs = {
+            "context": context,
+            "question": question,
+            "chat_history": history_messages,
+        }
+        return inputs, sources
     
     async def ainvoke(
         self,
@@ -145,37 +303,24 @@ Please provide a comprehensive answer based on the context above."""
         Returns:
             Dict containing answer and optionally sources
         """
-        # Retrieve relevant documents
-        results = await self.retriever.retrieve(
-            query=question,
-            top_k=top_k,
-            filters=filters
+        # Retrieve relevant documents and format context and history
+        inputs, sources = await self._prepare_inputs(
+            question, top_k, filters, chat_history, with_sources=self.include_sources
         )
         
-        # Format context and history
-        context = self._format_context(results)
-        history_messages = self._format_chat_history(chat_history)
-        
-        # Invoke chain using LCEL (LangChain 1.x)
-        answer = await self.chain.ainvoke({
-            "context": context,
-            "question": question,
-            "chat_history": history_messages,
-        })
+        if self.use_lcel:
+            # Invoke chain using LCEL (LangChain 1.x)
+            answer = await self.chain.ainvoke(inputs)
+        else:
+            # Call the chat model directly, skipping per-step Runnable overhead
+            message = await self.llm.ainvoke(self._build_messages(inputs))
+            answer = message.content
         
         # Build response
         response = {"answer": answer}
         
         if self.include_sources:
-            response["sources"] = [
-                {
-                    "id": r.id,
-                    "content": r.content[:200] + "..." if len(r.content) > 200 else r.content,
-                    "score": r.score,
-                    "metadata": r.metadata
-                }
-                for r in results
-            ]
+            response["sources"] = sources
         
         return response
     
@@ -197,24 +342,19 @@ Please provide a comprehensive answer based on the context above."""
         Yields:
             Response chunks as strings
         """
-        # Retrieve relevant documents
-        results = await self.retriever.retrieve(
-            query=question,
-            top_k=top_k,
-            filters=filters
+        # Retrieve relevant documents and format context and history
+        inputs, _ = await self._prepare_inputs(
+            question, top_k, filters, chat_history
         )
         
-        # Format context and history
-        context = self._format_context(results)
-        history_messages = self._format_chat_history(chat_history)
+        if self.use_lcel:
+            # Stream using LCEL (LangChain 1.x)
+            async for chunk in self.chain.astream(inputs):
+                yield chunk
+            return
         
-        # Stream using LCEL (LangChain 1.x)
-        async for chunk in self.chain.astream({
-            "context": context,
-            "question": question,
-            "chat_history": history_messages,
-        }):
-            yield chunk
+        async for chunk in self.llm.astream(self._build_messages(inputs)):
+            yield chunk.content
     
     def invoke(
         self,
@@ -225,11 +365,10 @@ Please provide a comprehensive answer based on the context above."""
     ) -> Dict[str, Any]:
         """Sync invoke the RAG chain (for non-async contexts).
         
-        Note: This method retrieves documents synchronously.
-        For async operations, use ainvoke().
+        Note: This runs ainvoke() on a shared background event loop and
+        blocks until it finishes. For async operations, use ainvoke().
         """
-        import asyncio
-        return asyncio.run(self.ainvoke(question, top_k, filters, chat_history))
+        return _run_sync(self.ainvoke(question, top_k, filters, chat_history))
 
 
 class LangChainConversationChain:
@@ -273,15 +412,7 @@ class LangChainConversationChain:
         chat_history: Optional[List[Dict[str, str]]] = None,
     ) -> str:
         """Async invoke conversation."""
-        history_messages = []
-        if chat_history:
-            for msg in chat_history:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                if role == "user":
-                    history_messages.append(HumanMessage(content=content))
-                elif role == "assistant":
-                    history_messages.append(AIMessage(content=content))
+        history_messages = _format_chat_history(chat_history, _CONVERSATION_ROLE_MAP)
         
         return await self.chain.ainvoke({
             "input": user_input,
@@ -294,15 +425,7 @@ class LangChainConversationChain:
         chat_history: Optional[List[Dict[str, str]]] = None,
     ) -> AsyncIterator[str]:
         """Async stream conversation."""
-        history_messages = []
-        if chat_history:
-            for msg in chat_history:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                if role == "user":
-                    history_messages.append(HumanMessage(content=content))
-                elif role == "assistant":
-                    history_messages.append(AIMessage(content=content))
+        history_messages = _format_chat_history(chat_history, _CONVERSATION_ROLE_MAP)
         
         async for chunk in self.chain.astream({
             "input": user_input,
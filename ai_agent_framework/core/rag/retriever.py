@@ -1,26 +1,38 @@
 """Retriever for RAG system."""
 
+import asyncio
 from typing import List, Optional, Dict, Any
 from core.vector_store.base import BaseVectorStore, Document, SearchResult
 from core.rag.embeddings import EmbeddingModel
+from core.rag.search_batcher import SearchBatcher
+from core.rag.semantic_cache import SemanticCache
 
 
 class Retriever:
     """Document retriever for RAG."""
     
+    # Batches whose insert may still be running while later batches embed
+    MAX_INFLIGHT_INSERTS = 4
+    
     def __init__(
         self,
         vector_store: BaseVectorStore,
         embedding_model: EmbeddingModel,
         collection_name: str,
         top_k: int = 5,
-        score_threshold: float = 0.0
+        score_threshold: float = 0.0,
+        semantic_cache: Optional[SemanticCache] = None,
+        search_batcher: Optional[SearchBatcher] = None
     ):
         self.vector_store = vector_store
         self.embedding_model = embedding_model
         self.collection_name = collection_name
         self.top_k = top_k
         self.score_threshold = score_threshold
+        # Shared across retrievers; near-duplicate queries skip the search
+        self.semantic_cache = semantic_cache
+        # Shared across retrievers; concurrent searches go out as one request
+        self.search_batcher = search_batcher
     
     async def add_documents(
         self,
@@ -29,6 +41,9 @@ class Retriever:
     ) -> List[str]:
         """Add documents to the retriever.
         
+        Embedding and insertion are pipelined: batch N+1 is embedded on a
+        worker thread while the inserts of earlier batches are in flight.
+        
         Args:
             documents: List of dicts with 'content' and optional 'metadata'
             batch_size: Batch size for processing
@@ -44,29 +59,54 @@ class Retriever:
                 dimension=self.embedding_model.dimension
             )
         
-        all_ids = []
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.MAX_INFLIGHT_INSERTS)
+        inserts: List[asyncio.Task] = []
         
-        # Process in batches
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            
-            # Extract contents and embed
-            contents = [doc["content"] for doc in batch]
-            embeddings = self.embedding_model.embed_documents(contents)
-            
-            # Create Document objects
-            docs = []
-            for j, doc in enumerate(batch):
-                docs.append(Document(
-                    id=doc.get("id"),
-                    content=doc["content"],
-                    metadata=doc.get("metadata", {}),
-                    embedding=embeddings[j]
-                ))
+        async def insert(docs: List[Document]) -> List[str]:
+            try:
+                return await self.vector_store.insert(self.collection_name, docs)
+            finally:
+                slots.release()
+        
+        try:
+            # Process in batches
+            for i in range(0, len(documents), batch_size):
+                batch = documents[i:i + batch_size]
+                
+                # Extract contents and embed off the event loop
+                contents = [doc["content"] for doc in batch]
+                embeddings = await loop.run_in_executor(
+                    None, self.embedding_model.embed_documents_np, contents
+                )
+                
+                # Create Document objects
+                docs = []
+                for j, doc in enumerate(batch):
+                    docs.append(Document(
+                        id=doc.get("id"),
+                        content=doc["content"],
+                        metadata=doc.get("metadata", {}),
+                        embedding=embeddings[j]
+                    ))
+                
+                # Insert in the background, waiting if too many are pending
+                await slots.acquire()
+                inserts.append(asyncio.create_task(insert(docs)))
             
-            # Insert
-            ids = await self.vector_store.insert(self.collection_name, docs)
-            all_ids.extend(ids)
+            batch_ids = await asyncio.gather(*inserts)
+        except BaseException:
+            for task in inserts:
+                task.cancel()
+            raise
+        
+        all_ids = [doc_id for ids in batch_ids for doc_id in ids]
+        
+        # One flush for the whole load instead of one per batch
+        await self.vector_store.flush(self.collection_name)
+        
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate(self.collection_name)
         
         return all_ids
     
@@ -86,16 +126,28 @@ class Retriever:
         Returns:
             List of search results
         """
+        top_k = top_k or self.top_k
+        
         # Embed query
-        query_vector = self.embedding_model.embed_query(query)
+        query_vector = await self.embedding_model.aembed_query(query)
         
-        # Search
-        results = await self.vector_store.search(
-            self.collection_name,
-            query_vector=query_vector,
-            top_k=top_k or self.top_k,
-            filters=filters
-        )
+        cache = self.semantic_cache
+        results = None
+        if cache is not None:
+            cache_key = cache.make_key(top_k, filters)
+            results = cache.get(self.collection_name, cache_key, query_vector)
+        
+        if results is None:
+            # Search
+            search = self.search_batcher.search if self.search_batcher else self.vector_store.search
+            results = await search(
+                self.collection_name,
+                query_vector=query_vector,
+                top_k=top_k,
+                filters=filters
+            )
+            if cache is not None:
+                cache.set(self.collection_name, cache_key, query_vector, results)
         
         # Filter by score threshold
         if self.score_threshold > 0:
@@ -112,7 +164,10 @@ class Retriever:
         Returns:
             True if successful
         """
-        return await self.vector_store.delete(self.collection_name, ids)
+        deleted = await self.vector_store.delete(self.collection_name, ids)
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate(self.collection_name)
+        return deleted
     
     async def get_documents(self, ids: List[str]) -> List[Document]:
         """Get documents by IDs.
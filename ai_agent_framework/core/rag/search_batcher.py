@@ -0,0 +1,105 @@
+"""Coalescing of concurrent vector searches into multi-query requests."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.rag.semantic_cache import SemanticCache
+from core.vector_store.base import BaseVectorStore, SearchResult
+
+
+class SearchBatcher:
+    """Batch concurrent searches that share a collection, top_k and filters.
+    
+    A search with nothing in flight for its key is sent immediately, so a
+    lightly loaded server adds no latency. Searches arriving while one is
+    in flight are queued and, once it returns, sent together through
+    `search_batch` in groups of up to `max_batch_size`.
+    """
+    
+    def __init__(self, vector_store: BaseVectorStore, max_batch_size: int = 32):
+        """Initialize batcher.
+        
+        Args:
+            vector_store: Store to search
+            max_batch_size: Maximum query vectors per batched request
+        """
+        self.vector_store = vector_store
+        self.max_batch_size = max_batch_size
+        # Queued (vector, future) pairs per key; a key is present while a
+        # search for it is in flight
+        self._pending: Dict[Tuple[str, bytes], List[Tuple[List[float], asyncio.Future]]] = {}
+        self._drains: Set[asyncio.Task] = set()
+    
+    async def search(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """Search, sharing a request with concurrent searches when possible.
+        
+        Args:
+            collection_name: Name of the collection
+            query_vector: Query embedding vector
+            top_k: Number of results to return
+            filters: Optional metadata filters
+        
+        Returns:
+            List of search results
+        """
+        key = (collection_name, SemanticCache.make_key(top_k, filters))
+        pending = self._pending.get(key)
+        if pending is not None:
+            future = asyncio.get_running_loop().create_future()
+            pending.append((query_vector, future))
+            # Shielded so one cancelled caller doesn't fail the batch
+            return await asyncio.shield(future)
+        
+        self._pending[key] = []
+        try:
+            return await self.vector_store.search(
+                collection_name,
+                query_vector=query_vector,
+                top_k=top_k,
+                filters=filters
+            )
+        finally:
+            if self._pending[key]:
+                task = asyncio.create_task(self._drain(key, collection_name, top_k, filters))
+                self._drains.add(task)
+                task.add_done_callback(self._drains.discard)
+            else:
+                del self._pending[key]
+    
+    async def _drain(
+        self,
+        key: Tuple[str, bytes],
+        collection_name: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]]
+    ):
+        """Send queued searches in batches until none are left."""
+        pending = self._pending[key]
+        try:
+            while pending:
+                batch = pending[:self.max_batch_size]
+                del pending[:self.max_batch_size]
+                try:
+                    results = await self.vector_store.search_batch(
+                        collection_name,
+                        [vector for vector, _ in batch],
+                        top_k=top_k,
+                        filters=filters
+                    )
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                for (_, future), hits in zip(batch, results):
+                    if not future.done():
+                        future.set_result(hits)
+        finally:
+            del self._pending[key]
@@ -0,0 +1,154 @@
+"""Semantic cache for retrieval results."""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+from core.vector_store.base import SearchResult
+
+
+class SemanticCache:
+    """Approximate cache mapping query embeddings to search results.
+    
+    A lookup scores the query vector against every cached query vector in
+    one matrix-vector product; a cached entry is reused when its cosine
+    similarity reaches `threshold` and it was stored for the same
+    collection, top_k and filters. Vectors live in a preallocated ring
+    buffer, so the oldest entry is overwritten once `max_entries` is hit.
+    
+    All methods are synchronous and never await, so calls made from the
+    event loop need no locking.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        threshold: float = 0.95,
+        ttl: Optional[float] = 300.0
+    ):
+        """Initialize cache.
+        
+        Args:
+            max_entries: Maximum number of cached queries
+            threshold: Minimum cosine similarity for a hit
+            ttl: Seconds an entry stays valid, or None to never expire
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Allocated on first store, once the embedding dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        # (collection, key, results, expires_at) per slot, None when empty
+        self._entries: List[Optional[Tuple[str, bytes, List[SearchResult], Optional[float]]]] = []
+        self._next = 0
+    
+    @staticmethod
+    def make_key(top_k: int, filters: Optional[Dict[str, Any]]) -> bytes:
+        """Build the exact-match part of a cache key."""
+        if not filters:
+            return b"%d" % top_k
+        return b"%d:" % top_k + orjson.dumps(
+            filters, option=orjson.OPT_SORT_KEYS, default=repr
+        )
+    
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        """Return the vector as a unit-length float32 array."""
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm > 0 else v
+    
+    def get(
+        self,
+        collection_name: str,
+        key: bytes,
+        vector: Sequence[float]
+    ) -> Optional[List[SearchResult]]:
+        """Look up results cached for a near-identical query.
+        
+        Args:
+            collection_name: Collection the query targets
+            key: Key from make_key
+            vector: Query embedding
+        
+        Returns:
+            Copy of the cached results, or None on a miss
+        """
+        if self._vectors is None or not self._entries:
+            self.misses += 1
+            return None
+        
+        v = self._normalize(vector)
+        scores = self._vectors[:len(self._entries)] @ v
+        candidates = np.flatnonzero(scores >= self.threshold)
+        now = time.monotonic()
+        
+        for idx in candidates[np.argsort(-scores[candidates])]:
+            entry = self._entries[idx]
+            if entry is None or entry[0] != collection_name or entry[1] != key:
+                continue
+            if entry[3] is not None and entry[3] < now:
+                self._entries[idx] = None
+                continue
+            self.hits += 1
+            return list(entry[2])
+        
+        self.misses += 1
+        return None
+    
+    def set(
+        self,
+        collection_name: str,
+        key: bytes,
+        vector: Sequence[float],
+        results: List[SearchResult]
+    ):
+        """Cache results for a query, overwriting the oldest slot if full.
+        
+        Args:
+            collection_name: Collection the query targets
+            key: Key from make_key
+            vector: Query embedding
+            results: Search results to cache
+        """
+        if self.max_entries <= 0:
+            return
+        
+        v = self._normalize(vector)
+        if self._vectors is None or self._vectors.shape[1] != v.shape[0]:
+            self._vectors = np.zeros((self.max_entries, v.shape[0]), dtype=np.float32)
+            self._entries = []
+            self._next = 0
+        
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        entry = (collection_name, key, list(results), expires_at)
+        
+        slot = self._next
+        self._vectors[slot] = v
+        if slot == len(self._entries):
+            self._entries.append(entry)
+        else:
+            self._entries[slot] = entry
+        self._next = (slot + 1) % self.max_entries
+    
+    def invalidate(self, collection_name: Optional[str] = None):
+        """Drop cached results for a collection, or everything.
+        
+        Args:
+            collection_name: Collection whose entries to drop (None for all)
+        """
+        if collection_name is None:
+            self._entries = []
+            self._next = 0
+            return
+        
+        for idx, entry in enumerate(self._entries):
+            if entry is not None and entry[0] == collection_name:
+                self._entries[idx] = None
+    
+    def __len__(self) -> int:
+        return sum(entry is not None for entry in self._entries)
@@ -1,16 +1,34 @@
 """Base Vector Store interface."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class Document(BaseModel):
-    """Document model for vector store."""
+    """Document model for vector store.
+    
+    `metadata` is always a decoded, JSON-compatible dict. Stores that hand
+    back raw JSON (str/bytes) for metadata decode it before building
+    Documents or SearchResults, so callers never see serialized payloads.
+    
+    `embedding` is held as a float32 array: one array conversion instead
+    of validating every element of a float list.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
     id: Optional[str] = None
     content: str
     metadata: Dict[str, Any] = {}
-    embedding: Optional[List[float]] = None
+    embedding: Optional[np.ndarray] = None
+    
+    @field_validator("embedding", mode="before")
+    @classmethod
+    def _to_array(cls, value: Any) -> Optional[np.ndarray]:
+        """Convert an embedding to a float32 array (no copy if it is one)."""
+        return None if value is None else np.asarray(value, dtype=np.float32)
 
 
 class SearchResult(BaseModel):
@@ -37,7 +55,7 @@ class BaseVectorStore(ABC):
             collection_name: Name of the collection
             dimension: Vector dimension
             **kwargs: Additional parameters
-            
+        
         Returns:
             True if successful
         """
@@ -49,7 +67,7 @@ class BaseVectorStore(ABC):
         
         Args:
             collection_name: Name of the collection
-            
+        
         Returns:
             True if successful
         """
@@ -61,7 +79,7 @@ class BaseVectorStore(ABC):
         
         Args:
             collection_name: Name of the collection
-            
+        
         Returns:
             True if exists
         """
@@ -78,12 +96,22 @@ class BaseVectorStore(ABC):
         Args:
             collection_name: Name of the collection
             documents: List of documents with embeddings
-            
+        
         Returns:
             List of inserted document IDs
         """
         pass
     
+    async def flush(self, collection_name: str):
+        """Persist buffered inserts of a collection.
+        
+        Inserts are not flushed individually; bulk loaders call this once
+        at the end. The default does nothing, for stores without buffering.
+        
+        Args:
+            collection_name: Name of the collection
+        """
+    
     @abstractmethod
     async def search(
         self,
@@ -99,12 +127,38 @@ class BaseVectorStore(ABC):
             query_vector: Query embedding vector
             top_k: Number of results to return
             filters: Optional metadata filters
-            
+        
         Returns:
             List of search results
         """
         pass
     
+    async def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[SearchResult]]:
+        """Search for several query vectors at once.
+        
+        The default runs one search per vector concurrently; stores with
+        native multi-vector search should override it.
+        
+        Args:
+            collection_name: Name of the collection
+            query_vectors: Query embedding vectors
+            top_k: Number of results per query
+            filters: Optional metadata filters applied to every query
+        
+        Returns:
+            One list of search results per query vector, in order
+        """
+        return list(await asyncio.gather(*(
+            self.search(collection_name, vector, top_k, filters)
+            for vector in query_vectors
+        )))
+    
     @abstractmethod
     async def delete(
         self,
@@ -116,7 +170,7 @@ class BaseVectorStore(ABC):
         Args:
             collection_name: Name of the collection
             ids: List of document IDs to delete
-            
+        
         Returns:
             True if successful
         """
@@ -133,8 +187,58 @@ class BaseVectorStore(ABC):
         Args:
             collection_name: Name of the collection
             ids: List of document IDs
-            
+        
         Returns:
             List of documents
         """
         pass
+    
+    @abstractmethod
+    async def get_by_filter(
+        self,
+        collection_name: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100
+    ) -> List[Document]:
+        """Get documents by metadata filters, without a vector search.
+        
+        Args:
+            collection_name: Name of the collection
+            filters: Optional metadata filters
+            limit: Maximum number of documents to return
+        
+        Returns:
+            List of documents (without embeddings)
+        """
+        pass
+    
+    @abstractmethod
+    async def scan_metadata(
+        self,
+        collection_name: str,
+        filters: Optional[Dict[str, Any]] = None,
+        min_values: Optional[Dict[str, float]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Get the ids and metadata of all matching documents, without content.
+        
+        Args:
+            collection_name: Name of the collection
+            filters: Optional metadata equality filters
+            min_values: Optional lower bounds (inclusive) on numeric metadata
+        
+        Returns:
+            Document IDs and their metadata, in the same order
+        """
+        pass
+    
+    @abstractmethod
+    async def count(self, collection_name: str) -> int:
+        """Get document count in collection.
+        
+        Args:
+            collection_name: Name of the collection
+        
+        Returns:
+            Number of documents
+        """
+        pass
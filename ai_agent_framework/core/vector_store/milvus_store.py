@@ -1,7 +1,13 @@
 """Milvus Vector Store implementation."""
 
+import asyncio
+import json
 import uuid
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar, Union
+import numpy as np
+import orjson
 from pymilvus import (
     connections,
     utility,
@@ -15,6 +21,73 @@ from core.vector_store.base import BaseVectorStore, Document, SearchResult
 from app.config import get_settings
 
 
+T = TypeVar("T")
+
+# VARCHAR max_length of the content field, in UTF-8 bytes
+CONTENT_MAX_BYTES = 65535
+
+# Maximum ids per `id in [...]` expression sent to Milvus
+ID_EXPR_CHUNK_SIZE = 1024
+
+# Rows per page when scanning a collection with a query iterator
+SCAN_BATCH_SIZE = 4096
+
+def _load_metadata(raw: Union[Dict[str, Any], str, bytes, None]) -> Dict[str, Any]:
+    """Decode a JSON metadata field, which pymilvus may return as raw JSON."""
+    if raw is None:
+        return {}
+    if isinstance(raw, (str, bytes)):
+        return orjson.loads(raw)
+    return raw
+
+
+@lru_cache(maxsize=256)
+def _compile_filter_template(keys: Tuple[str, ...]) -> str:
+    """Build an equality-filter expression template for a set of metadata keys.
+    
+    Keys are quoted into the template; each value is left as a `{}` hole
+    for an already-quoted literal.
+    """
+    conditions = []
+    for key in keys:
+        quoted = json.dumps(key, ensure_ascii=False).replace("{", "{{").replace("}", "}}")
+        conditions.append(f"metadata[{quoted}] == {{}}")
+    return " and ".join(conditions)
+
+
+def _truncate_utf8(text: str, max_bytes: int) -> str:
+    """Truncate text to at most max_bytes of UTF-8 without splitting a character."""
+    # A character is at most 4 bytes, so short strings need no encoding
+    if len(text) * 4 <= max_bytes:
+        return text
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def _id_in_exprs(ids: List[str], chunk_size: int = ID_EXPR_CHUNK_SIZE) -> List[str]:
+    """Build `id in [...]` expressions covering ids, chunk_size ids each."""
+    # A JSON array of strings is also a valid Milvus list literal
+    return [
+        "id in " + orjson.dumps(ids[start:start + chunk_size]).decode()
+        for start in range(0, len(ids), chunk_size)
+    ]
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (1-D or row-wise 2-D) to unit L2 norm."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _quote_filter_value(value: Any) -> str:
+    """Render a filter value as a Milvus literal, escaping strings."""
+    if isinstance(value, (str, bool, int, float)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
 class MilvusVectorStore(BaseVectorStore):
     """Milvus vector store implementation."""
     
@@ -25,7 +98,8 @@ class MilvusVectorStore(BaseVectorStore):
         user: Optional[str] = None,
         password: Optional[str] = None,
         db_name: Optional[str] = None,
-        alias: str = "default"
+        alias: str = "default",
+        max_workers: Optional[int] = None
     ):
         settings = get_settings()
         self.host = host or settings.milvus_host
@@ -34,41 +108,147 @@ class MilvusVectorStore(BaseVectorStore):
         self.password = password or settings.milvus_password
         self.db_name = db_name or settings.milvus_db_name
         self.alias = alias
+        self.index_type = settings.milvus_index_type
+        self.metric_type = settings.milvus_metric_type
+        self.nlist = settings.milvus_nlist
+        self.nprobe = settings.milvus_nprobe
         self._connected = False
+        self._connect_lock = asyncio.Lock()
+        # pymilvus is blocking; its calls run here, off the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.milvus_max_workers,
+            thread_name_prefix="milvus"
+        )
+        # Collection handles and which of them are loaded, per process
+        self._collections: Dict[str, Collection] = {}
+        self._loaded: Set[str] = set()
+        # (index_type, metric_type) of each collection's vector index
+        self._index_info: Dict[str, Tuple[str, str]] = {}
+    
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking pymilvus call on the store's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
     
     async def connect(self):
         """Connect to Milvus server."""
-        if not self._connected:
-            connections.connect(
-                alias=self.alias,
-                host=self.host,
-                port=self.port,
-                user=self.user if self.user else None,
-                password=self.password if self.password else None,
-                db_name=self.db_name,
-            )
-            self._connected = True
+        if self._connected:
+            return
+        async with self._connect_lock:
+            if not self._connected:
+                await self._run(
+                    connections.connect,
+                    alias=self.alias,
+                    host=self.host,
+                    port=self.port,
+                    user=self.user if self.user else None,
+                    password=self.password if self.password else None,
+                    db_name=self.db_name,
+                )
+                self._connected = True
     
     async def disconnect(self):
         """Disconnect from Milvus server."""
         if self._connected:
-            connections.disconnect(self.alias)
+            await self._run(connections.disconnect, self.alias)
             self._connected = False
+            self._collections.clear()
+            self._loaded.clear()
+            self._index_info.clear()
+    
+    async def _get_collection(self, collection_name: str, load: bool = False) -> Collection:
+        """Get a cached collection handle.
+        
+        Args:
+            collection_name: Collection name
+            load: Load the collection into memory if not done yet
+        
+        Returns:
+            Collection handle
+        """
+        collection = self._collections.get(collection_name)
+        if collection is not None and (not load or collection_name in self._loaded):
+            return collection
+        return await self._run(self._open_collection, collection_name, load)
+    
+    def _open_collection(self, collection_name: str, load: bool) -> Collection:
+        """Create and optionally load a collection handle (blocking)."""
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            collection = self._collections[collection_name] = Collection(
+                collection_name, using=self.alias
+            )
+        
+        # load() is a server round trip even when already loaded
+        if load and collection_name not in self._loaded:
+            collection.load()
+            self._loaded.add(collection_name)
+        
+        if load and collection_name not in self._index_info:
+            self._index_info[collection_name] = self._read_index_info(collection)
+        return collection
+    
+    def _read_index_info(self, collection: Collection) -> Tuple[str, str]:
+        """Read the vector index type and metric of a collection (blocking)."""
+        for index in collection.indexes:
+            if index.field_name == "embedding":
+                params = index.params
+                return (
+                    params.get("index_type", self.index_type),
+                    params.get("metric_type", self.metric_type)
+                )
+        return self.index_type, self.metric_type
+    
+    @staticmethod
+    def _index_build_params(index_type: str, nlist: int) -> Dict[str, Any]:
+        """Default build parameters for a vector index type."""
+        if index_type.startswith("IVF"):
+            return {"nlist": nlist}
+        if index_type.startswith("HNSW"):
+            return {"M": 16, "efConstruction": 200}
+        return {}
+    
+    def _index_of(self, collection_name: str) -> Tuple[str, str]:
+        """Get (index_type, metric_type) of a collection, or the defaults."""
+        return self._index_info.get(collection_name, (self.index_type, self.metric_type))
+    
+    def _search_params(self, collection_name: str, top_k: int) -> Dict[str, Any]:
+        """Search parameters matching a collection's vector index."""
+        index_type, metric_type = self._index_of(collection_name)
+        if index_type.startswith("IVF"):
+            params = {"nprobe": self.nprobe}
+        elif index_type.startswith("HNSW"):
+            params = {"ef": max(64, top_k)}
+        else:
+            params = {}
+        return {"metric_type": metric_type, "params": params}
     
     async def create_collection(
         self,
         collection_name: str,
         dimension: int,
         description: str = "",
-        index_type: str = "IVF_FLAT",
-        metric_type: str = "COSINE",
-        nlist: int = 1024,
+        index_type: Optional[str] = None,
+        metric_type: Optional[str] = None,
+        nlist: Optional[int] = None,
         **kwargs
     ) -> bool:
-        """Create a new collection with index."""
+        """Create a new collection with index.
+        
+        The metric defaults to IP: vectors are normalized on insert and
+        search, so inner product equals cosine similarity without Milvus
+        normalizing at every distance evaluation.
+        
+        The vector index defaults to IVF_SQ8: vectors are scalar-quantized
+        to 8 bits, a quarter of the memory and scan bandwidth of IVF_FLAT,
+        typically for under 1% recall loss at RAG-sized top_k. Use
+        IVF_FLAT for exact distances within probed lists, or HNSW for
+        graph search. Build parameters can be overridden with an
+        `index_params` keyword argument.
+        """
         await self.connect()
         
-        if utility.has_collection(collection_name, using=self.alias):
+        if await self._run(utility.has_collection, collection_name, using=self.alias):
             return True
         
         # Define schema
@@ -82,7 +262,7 @@ class MilvusVectorStore(BaseVectorStore):
             FieldSchema(
                 name="content",
                 dtype=DataType.VARCHAR,
-                max_length=65535
+                max_length=CONTENT_MAX_BYTES
             ),
             FieldSchema(
                 name="metadata",
@@ -101,25 +281,34 @@ class MilvusVectorStore(BaseVectorStore):
         )
         
         # Create collection
-        collection = Collection(
+        collection = await self._run(
+            Collection,
             name=collection_name,
             schema=schema,
             using=self.alias
         )
         
         # Create index
+        index_type = index_type or self.index_type
+        metric_type = metric_type or self.metric_type
         index_params = {
             "index_type": index_type,
             "metric_type": metric_type,
-            "params": {"nlist": nlist}
+            "params": kwargs.get("index_params") or self._index_build_params(
+                index_type, nlist or self.nlist
+            )
         }
-        collection.create_index(
+        await self._run(
+            collection.create_index,
             field_name="embedding",
             index_params=index_params
         )
         
         # Load collection
-        collection.load()
+        await self._run(collection.load)
+        self._collections[collection_name] = collection
+        self._loaded.add(collection_name)
+        self._index_info[collection_name] = (index_type, metric_type)
         
         return True
     
@@ -127,14 +316,17 @@ class MilvusVectorStore(BaseVectorStore):
         """Drop a collection."""
         await self.connect()
         
-        if utility.has_collection(collection_name, using=self.alias):
-            utility.drop_collection(collection_name, using=self.alias)
+        if await self._run(utility.has_collection, collection_name, using=self.alias):
+            await self._run(utility.drop_collection, collection_name, using=self.alias)
+        self._collections.pop(collection_name, None)
+        self._loaded.discard(collection_name)
+        self._index_info.pop(collection_name, None)
         return True
     
     async def collection_exists(self, collection_name: str) -> bool:
         """Check if collection exists."""
         await self.connect()
-        return utility.has_collection(collection_name, using=self.alias)
+        return await self._run(utility.has_collection, collection_name, using=self.alias)
     
     async def insert(
         self,
@@ -144,27 +336,57 @@ class MilvusVectorStore(BaseVectorStore):
         """Insert documents into collection."""
         await self.connect()
         
-        collection = Collection(collection_name, using=self.alias)
+        collection = await self._get_collection(collection_name)
         
-        # Prepare data
-        ids = []
-        contents = []
-        metadatas = []
-        embeddings = []
+        # Normalizing depends on the collection's actual metric, which isn't
+        # read yet for an existing collection that hasn't been loaded
+        if collection_name not in self._index_info:
+            self._index_info[collection_name] = await self._run(
+                self._read_index_info, collection
+            )
         
-        for doc in documents:
-            doc_id = doc.id or str(uuid.uuid4())
-            ids.append(doc_id)
-            contents.append(doc.content[:65535])  # Truncate if needed
-            metadatas.append(doc.metadata)
-            embeddings.append(doc.embedding)
+        # Prepare data, one column per field
+        ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+        # VARCHAR limits are in bytes, so truncate the UTF-8 encoding
+        contents = [_truncate_utf8(doc.content, CONTENT_MAX_BYTES) for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        embeddings = self._vector_column(
+            [doc.embedding for doc in documents],
+            normalize=self._index_of(collection_name)[1] == "IP"
+        )
         
-        # Insert
-        collection.insert([ids, contents, metadatas, embeddings])
-        collection.flush()
+        # Insert; data is durable in Milvus' log and searchable without a
+        # flush, which would seal segments on every call
+        await self._run(collection.insert, [ids, contents, metadatas, embeddings])
         
         return ids
     
+    async def flush(self, collection_name: str):
+        """Seal and persist the collection's growing segments."""
+        await self.connect()
+        
+        collection = await self._get_collection(collection_name)
+        await self._run(collection.flush)
+    
+    @staticmethod
+    def _vector_column(vectors: List[Any], normalize: bool = False) -> List[List[float]]:
+        """Convert a column of vectors to the form pymilvus packs fastest.
+        
+        pymilvus copies vectors into protobuf float by float, which is
+        several times faster for Python floats than for numpy scalars.
+        Array vectors are therefore stacked into one float32 matrix and
+        converted with a single tolist() call.
+        
+        Args:
+            vectors: Embedding vectors (lists or arrays)
+            normalize: Scale vectors to unit length, for IP indexes
+        """
+        if normalize and vectors:
+            return _normalize_rows(np.asarray(vectors, dtype=np.float32)).tolist()
+        if vectors and isinstance(vectors[0], np.ndarray):
+            return np.asarray(vectors, dtype=np.float32).tolist()
+        return vectors
+    
     async def search(
         self,
         collection_name: str,
@@ -173,30 +395,32 @@ class MilvusVectorStore(BaseVectorStore):
         filters: Optional[Dict[str, Any]] = None
     ) -> List[SearchResult]:
         """Search for similar documents."""
+        return (await self.search_batch(collection_name, [query_vector], top_k, filters))[0]
+    
+    async def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[SearchResult]]:
+        """Search for several query vectors in one Milvus request."""
         await self.connect()
         
-        collection = Collection(collection_name, using=self.alias)
-        collection.load()
+        collection = await self._get_collection(collection_name, load=True)
         
         # Build filter expression
-        expr = None
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                if isinstance(value, str):
-                    conditions.append(f'metadata["{key}"] == "{value}"')
-                else:
-                    conditions.append(f'metadata["{key}"] == {value}')
-            expr = " and ".join(conditions) if conditions else None
-        
-        # Search
-        search_params = {
-            "metric_type": "COSINE",
-            "params": {"nprobe": 10}
-        }
+        expr = self._build_filter_expr(filters)
+        
+        # Search with parameters matching the collection's index
+        search_params = self._search_params(collection_name, top_k)
+        if search_params["metric_type"] == "IP":
+            # Unit vectors make inner product equal to cosine similarity
+            query_vectors = _normalize_rows(np.asarray(query_vectors, dtype=np.float32)).tolist()
         
-        results = collection.search(
-            data=[query_vector],
+        results = await self._run(
+            collection.search,
+            data=query_vectors,
             anns_field="embedding",
             param=search_params,
             limit=top_k,
@@ -204,18 +428,51 @@ class MilvusVectorStore(BaseVectorStore):
             output_fields=["id", "content", "metadata"]
         )
         
-        # Parse results
-        search_results = []
-        for hits in results:
-            for hit in hits:
-                search_results.append(SearchResult(
+        # Parse results; fields come from our own schema, so skip validation
+        return [
+            [
+                SearchResult.model_construct(
                     id=hit.entity.get("id"),
                     content=hit.entity.get("content"),
-                    metadata=hit.entity.get("metadata", {}),
+                    metadata=_load_metadata(hit.entity.get("metadata")),
                     score=hit.distance
-                ))
+                )
+                for hit in hits
+            ]
+            for hits in results
+        ]
+    
+    @staticmethod
+    def _build_filter_expr(filters: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Build a Milvus boolean expression from metadata filters."""
+        if not filters:
+            return None
         
-        return search_results
+        template = _compile_filter_template(tuple(filters))
+        return template.format(*map(_quote_filter_value, filters.values()))
+    
+    @staticmethod
+    def _query_all(
+        collection: Collection,
+        expr: str,
+        output_fields: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Fetch every row matching expr, paging past the query window."""
+        iterator = collection.query_iterator(
+            batch_size=SCAN_BATCH_SIZE,
+            expr=expr,
+            output_fields=output_fields
+        )
+        rows = []
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                rows.extend(batch)
+        finally:
+            iterator.close()
+        return rows
     
     async def delete(
         self,
@@ -225,13 +482,14 @@ class MilvusVectorStore(BaseVectorStore):
         """Delete documents by IDs."""
         await self.connect()
         
-        collection = Collection(collection_name, using=self.alias)
+        if not ids:
+            return True
         
-        # Build expression
-        ids_str = ", ".join([f'"{id}"' for id in ids])
-        expr = f"id in [{ids_str}]"
+        collection = await self._get_collection(collection_name)
         
-        collection.delete(expr)
+        await asyncio.gather(*(
+            self._run(collection.delete, expr) for expr in _id_in_exprs(ids)
+        ))
         return True
     
     async def get_by_ids(
@@ -242,32 +500,99 @@ class MilvusVectorStore(BaseVectorStore):
         """Get documents by IDs."""
         await self.connect()
         
-        collection = Collection(collection_name, using=self.alias)
-        collection.load()
+        if not ids:
+            return []
+        
+        collection = await self._get_collection(collection_name, load=True)
+        
+        batches = await asyncio.gather(*(
+            self._run(
+                collection.query,
+                expr=expr,
+                output_fields=["id", "content", "metadata", "embedding"]
+            )
+            for expr in _id_in_exprs(ids)
+        ))
+        results = [item for batch in batches for item in batch]
+        
+        return [
+            Document.model_construct(
+                id=item.get("id"),
+                content=item.get("content"),
+                metadata=_load_metadata(item.get("metadata")),
+                embedding=np.asarray(item["embedding"], dtype=np.float32)
+                if item.get("embedding") is not None else None
+            )
+            for item in results
+        ]
+    
+    async def get_by_filter(
+        self,
+        collection_name: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100
+    ) -> List[Document]:
+        """Get documents by metadata filters using a scalar query."""
+        await self.connect()
+        
+        collection = await self._get_collection(collection_name, load=True)
         
-        # Build expression
-        ids_str = ", ".join([f'"{id}"' for id in ids])
-        expr = f"id in [{ids_str}]"
+        # Query needs an expression; match everything when unfiltered
+        expr = self._build_filter_expr(filters) or 'id != ""'
         
-        results = collection.query(
+        results = await self._run(
+            collection.query,
             expr=expr,
-            output_fields=["id", "content", "metadata", "embedding"]
+            output_fields=["id", "content", "metadata"],
+            limit=limit
         )
         
-        documents = []
-        for item in results:
-            documents.append(Document(
+        return [
+            Document.model_construct(
                 id=item.get("id"),
                 content=item.get("content"),
-                metadata=item.get("metadata", {}),
-                embedding=item.get("embedding")
-            ))
+                metadata=_load_metadata(item.get("metadata"))
+            )
+            for item in results
+        ]
+    
+    async def scan_metadata(
+        self,
+        collection_name: str,
+        filters: Optional[Dict[str, Any]] = None,
+        min_values: Optional[Dict[str, float]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Get ids and metadata of matching documents with a paged scalar query."""
+        await self.connect()
+        
+        collection = await self._get_collection(collection_name, load=True)
+        
+        conditions = []
+        equality_expr = self._build_filter_expr(filters)
+        if equality_expr:
+            conditions.append(equality_expr)
+        for key, value in (min_values or {}).items():
+            quoted = json.dumps(key, ensure_ascii=False)
+            conditions.append(f"metadata[{quoted}] >= {_quote_filter_value(value)}")
+        # Query needs an expression; match everything when unfiltered
+        expr = " and ".join(conditions) or 'id != ""'
         
-        return documents
+        # No content or embedding: rows are only ranked, not returned
+        rows = await self._run(self._query_all, collection, expr, ["id", "metadata"])
+        
+        ids = [row["id"] for row in rows]
+        metadatas = [_load_metadata(row.get("metadata")) for row in rows]
+        return ids, metadatas
     
     async def count(self, collection_name: str) -> int:
         """Get document count in collection."""
         await self.connect()
         
-        collection = Collection(collection_name, using=self.alias)
-        return collection.num_entities
+        # count(*) also sees unflushed inserts, unlike num_entities
+        collection = await self._get_collection(collection_name, load=True)
+        results = await self._run(
+            collection.query,
+            expr="",
+            output_fields=["count(*)"]
+        )
+        return results[0]["count(*)"] if results else 0
@@ -1,7 +1,20 @@
-"""Pydantic schemas for API."""
+"""Pydantic schemas for API.
 
-from schemas.chat import *
-from schemas.rag import *
-from schemas.memory import *
-from schemas.auth import *
-from schemas.finetune import *
+Schemas are importable from this package as before, but each submodule
+is only imported when one of its names is first looked up here.
+"""
+
+import importlib
+from typing import Any
+
+_SUBMODULES = ("chat", "rag", "memory", "auth", "finetune")
+
+
+def __getattr__(name: str) -> Any:
+    for submodule in _SUBMODULES:
+        module = importlib.import_module(f"schemas.{submodule}")
+        if hasattr(module, name):
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,20 @@
+"""Shared schema field types."""
+
+from typing import Annotated, Any, Dict
+
+from pydantic import BaseModel, ConfigDict, SkipValidation
+
+
+class Schema(BaseModel):
+    """Base for API schemas whose validators are built on first use.
+    
+    Pydantic otherwise compiles every model's core schema at import time;
+    deferring leaves models that no registered route touches unbuilt.
+    """
+    model_config = ConfigDict(defer_build=True)
+
+
+# Free-form dict filled in by server code (metadata, metrics, configs).
+# Response models declare it for the OpenAPI schema but skip validating
+# it, since the contents are opaque to the API. Not for request models.
+TrustedDict = Annotated[Dict[str, Any], SkipValidation]
@@ -1,32 +1,40 @@
 """Fine-tuning schemas."""
 
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
+from typing import List, Literal, Optional
+from pydantic import Field
 
+from schemas.common import Schema, TrustedDict
 
-class TrainingExampleInput(BaseModel):
+
+DatasetFormat = Literal["alpaca", "sharegpt", "openai", "qa"]
+TrainingStatus = Literal["pending", "running", "completed", "failed", "cancelled"]
+
+
+class TrainingExampleInput(Schema):
     """Training example input."""
     instruction: str = Field(..., description="Instruction/question")
     input: str = Field("", description="Optional additional input")
     output: str = Field(..., description="Expected output/answer")
 
 
-class DatasetUploadRequest(BaseModel):
+class DatasetUploadRequest(Schema):
     """Dataset upload request."""
     examples: List[TrainingExampleInput]
-    format: str = Field("alpaca", description="Format: alpaca, sharegpt, openai, qa")
+    format: DatasetFormat = Field("alpaca", description="Dataset format")
     name: str = Field(..., description="Dataset name")
 
 
-class DatasetUploadResponse(BaseModel):
-    """Dataset upload response."""
+@dataclass(frozen=True, slots=True)
+class DatasetUploadResponse:
+    """Dataset upload response, built by server code without validation."""
     name: str
     count: int
     format: str
-    validation: Dict[str, Any]
+    validation: TrustedDict
 
 
-class TrainingConfigInput(BaseModel):
+class TrainingConfigInput(Schema):
     """Training configuration input."""
     model_name_or_path: str = Field(..., description="Base model path")
     output_name: str = Field(..., description="Output model name")
@@ -48,42 +56,43 @@ class TrainingConfigInput(BaseModel):
     use_8bit: bool = False
 
 
-class TrainingStartRequest(BaseModel):
+class TrainingStartRequest(Schema):
     """Training start request."""
     dataset_name: str
     config: TrainingConfigInput
     eval_split: float = Field(0.1, ge=0, le=0.5)
 
 
-class TrainingStartResponse(BaseModel):
+class TrainingStartResponse(Schema):
     """Training start response."""
     job_id: str
-    status: str
+    status: TrainingStatus
     message: str
 
 
-class TrainingStatusResponse(BaseModel):
+class TrainingStatusResponse(Schema):
     """Training status response."""
     job_id: str
-    status: str  # pending, running, completed, failed
+    status: TrainingStatus
     progress: float  # 0-100
     current_step: int
     total_steps: int
     loss: Optional[float] = None
-    metrics: Dict[str, Any] = {}
+    metrics: TrustedDict = {}
     error: Optional[str] = None
 
 
-class TrainedModelInfo(BaseModel):
-    """Trained model information."""
+@dataclass(frozen=True, slots=True)
+class TrainedModelInfo:
+    """Trained model information, built by server code without validation."""
     name: str
     path: str
     base_model: str
     created_at: str
     is_lora: bool
-    config: Dict[str, Any] = {}
+    config: TrustedDict = field(default_factory=dict)
 
 
-class TrainedModelsResponse(BaseModel):
+class TrainedModelsResponse(Schema):
     """Trained models list response."""
     models: List[TrainedModelInfo]
@@ -1,29 +1,41 @@
 """Memory schemas."""
 
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
+from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import ConfigDict, Field
 
+from schemas.common import Schema, TrustedDict
 
-class MemoryItemInput(BaseModel):
+
+MemoryRole = Literal["user", "assistant", "system"]
+
+
+class MemoryItemInput(Schema):
     """Memory item input."""
     content: str = Field(..., description="Memory content")
-    role: str = Field("user", description="Role: user, assistant, system")
+    role: MemoryRole = Field("user", description="Message role")
     importance: float = Field(0.5, ge=0, le=1)
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
-class MemoryItemResponse(BaseModel):
-    """Memory item response."""
+class MemoryItemResponse(Schema):
+    """Memory item response.
+    
+    Validates straight from `MemoryItem` attributes, so a list of items can
+    be passed to `MemorySearchResponse` and converted in one call.
+    """
+    model_config = ConfigDict(from_attributes=True)
+    
     id: str
     content: str
     role: str
     importance: float
     timestamp: datetime
-    metadata: Dict[str, Any] = {}
+    metadata: TrustedDict = {}
 
 
-class MemorySearchRequest(BaseModel):
+class MemorySearchRequest(Schema):
     """Memory search request."""
     query: str
     limit: int = Field(10, ge=1, le=100)
@@ -31,33 +43,34 @@ class MemorySearchRequest(BaseModel):
     include_long_term: bool = True
 
 
-class MemorySearchResponse(BaseModel):
+class MemorySearchResponse(Schema):
     """Memory search response."""
     items: List[MemoryItemResponse]
     total: int
 
 
-class ConversationHistoryRequest(BaseModel):
+class ConversationHistoryRequest(Schema):
     """Conversation history request."""
     session_id: str
     max_turns: Optional[int] = None
     max_tokens: int = 4000
 
 
-class ConversationHistoryResponse(BaseModel):
+class ConversationHistoryResponse(Schema):
     """Conversation history response."""
     messages: List[Dict[str, str]]
     total_items: int
 
 
-class MemoryStatsResponse(BaseModel):
-    """Memory statistics response."""
+@dataclass(frozen=True, slots=True)
+class MemoryStatsResponse:
+    """Memory statistics response, built by server code without validation."""
     short_term_count: int
     long_term_count: int
     short_term_max_size: int
 
 
-class MemoryClearRequest(BaseModel):
+class MemoryClearRequest(Schema):
     """Memory clear request."""
     session_id: Optional[str] = None
     clear_short_term: bool = True
@@ -1,30 +1,33 @@
 """RAG schemas."""
 
+from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import Field
 
+from schemas.common import Schema, TrustedDict
 
-class DocumentInput(BaseModel):
+
+class DocumentInput(Schema):
     """Document input for RAG."""
     content: str = Field(..., description="Document content")
     metadata: Dict[str, Any] = Field(default_factory=dict)
     id: Optional[str] = None
 
 
-class DocumentsUploadRequest(BaseModel):
+class DocumentsUploadRequest(Schema):
     """Bulk document upload request."""
     documents: List[DocumentInput]
     collection_name: Optional[str] = None
 
 
-class DocumentsUploadResponse(BaseModel):
+class DocumentsUploadResponse(Schema):
     """Document upload response."""
     ids: List[str]
     count: int
     collection_name: str
 
 
-class RAGQueryRequest(BaseModel):
+class RAGQueryRequest(Schema):
     """RAG query request."""
     question: str = Field(..., description="User question")
     collection_name: Optional[str] = None
@@ -34,15 +37,15 @@ class RAGQueryRequest(BaseModel):
     stream: bool = False
 
 
-class SourceDocument(BaseModel):
+class SourceDocument(Schema):
     """Source document in RAG response."""
     id: str
     content: str
     score: float
-    metadata: Dict[str, Any] = {}
+    metadata: TrustedDict = {}
 
 
-class RAGQueryResponse(BaseModel):
+class RAGQueryResponse(Schema):
     """RAG query response."""
     answer: str
     sources: Optional[List[SourceDocument]] = None
@@ -50,19 +53,20 @@ class RAGQueryResponse(BaseModel):
     usage: Optional[Dict[str, int]] = None
 
 
-class CollectionInfo(BaseModel):
-    """Collection information."""
+@dataclass(frozen=True, slots=True)
+class CollectionInfo:
+    """Collection information, built by server code without validation."""
     name: str
     document_count: int
     dimension: int
 
 
-class CollectionListResponse(BaseModel):
+class CollectionListResponse(Schema):
     """Collection list response."""
     collections: List[CollectionInfo]
 
 
-class CollectionCreateRequest(BaseModel):
+class CollectionCreateRequest(Schema):
     """Collection creation request."""
     name: str = Field(..., min_length=1, max_length=100)
     dimension: int = Field(768, description="Vector dimension")
@@ -1,4 +1,5 @@
 """Utility modules."""
 
 from utils.logger import get_logger
+from utils.cache import TTLCache
 from utils.exceptions import *
@@ -4,7 +4,13 @@ from typing import Optional, Any
 
 
 class AIAgentException(Exception):
-    """Base exception for AI Agent Framework."""
+    """Base exception for AI Agent Framework.
+    
+    `code` is a stable, machine-readable error identifier that API error
+    responses carry alongside the message.
+    """
+    
+    code: str = "agent_error"
     
     def __init__(self, message: str, detail: Optional[Any] = None):
         self.message = message
@@ -14,39 +20,39 @@ class AIAgentException(Exception):
 
 class LLMException(AIAgentException):
     """LLM related exception."""
-    pass
+    code = "llm_error"
 
 
 class VectorStoreException(AIAgentException):
     """Vector store related exception."""
-    pass
+    code = "vector_store_error"
 
 
 class RAGException(AIAgentException):
     """RAG related exception."""
-    pass
+    code = "rag_error"
 
 
 class MemoryException(AIAgentException):
     """Memory related exception."""
-    pass
+    code = "memory_error"
 
 
 class FineTuneException(AIAgentException):
     """Fine-tuning related exception."""
-    pass
+    code = "finetune_error"
 
 
 class AuthenticationException(AIAgentException):
     """Authentication related exception."""
-    pass
+    code = "authentication_error"
 
 
 class ConfigurationException(AIAgentException):
     """Configuration related exception."""
-    pass
+    code = "configuration_error"
 
 
 class ValidationException(AIAgentException):
     """Validation related exception."""
-    pass
+    code = "validation_error"
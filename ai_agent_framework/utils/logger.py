@@ -1,36 +1,85 @@
 """Logging configuration."""
 
 import sys
+import threading
+from typing import Any, Dict
+
 from loguru import logger
 
 
-def get_logger(name: str = "ai_agent"):
-    """Get configured logger.
-    
-    Args:
-        name: Logger name
-        
-    Returns:
-        Configured logger instance
-    """
+# Bound loggers by name; sinks are added once per process and per name
+_loggers: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+_DEV_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+_PROD_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name} - {message}"
+
+
+def _configure_console(debug: bool):
+    """Replace loguru's default handler with the console sink."""
     # Remove default handler
     logger.remove()
     
-    # Add console handler with color
+    if debug:
+        # Add console handler with color
+        logger.add(
+            sys.stdout,
+            colorize=True,
+            format=_DEV_FORMAT,
+            level="DEBUG"
+        )
+        return
+    
+    # Plain INFO output: DEBUG calls return before a record is built, and
+    # tracebacks don't render local variables
     logger.add(
         sys.stdout,
-        colorize=True,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="DEBUG"
+        colorize=False,
+        format=_PROD_FORMAT,
+        level="INFO",
+        backtrace=False,
+        diagnose=False
     )
+
+
+def get_logger(name: str = "ai_agent", debug: bool = True):
+    """Get configured logger.
     
-    # Add file handler
-    logger.add(
-        f"logs/{name}.log",
-        rotation="10 MB",
-        retention="7 days",
-        compression="zip",
-        level="INFO"
-    )
+    Sinks are set up on the first call for a name; later calls return the
+    same bound logger without touching loguru's handlers.
+    
+    Args:
+        name: Logger name, also used for the log file
+        debug: Colored DEBUG-level console output with call sites; the
+            first call in the process decides the console setup
+    
+    Returns:
+        Configured logger instance
+    """
+    bound = _loggers.get(name)
+    if bound is not None:
+        return bound
     
-    return logger.bind(name=name)
+    with _lock:
+        bound = _loggers.get(name)
+        if bound is None:
+            if not _loggers:
+                _configure_console(debug)
+            
+            # Add file handler for records logged through this logger.
+            # Writes, rotation and compression run on loguru's queue
+            # thread; call `logger.complete()` before exit to flush
+            logger.add(
+                f"logs/{name}.log",
+                rotation="10 MB",
+                retention="7 days",
+                compression="zip",
+                level="INFO",
+                enqueue=True,
+                diagnose=debug,
+                filter=lambda record: record["extra"].get("name") == name
+            )
+            
+            bound = _loggers[name] = logger.bind(name=name)
+    return bound